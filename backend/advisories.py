@@ -3,10 +3,124 @@ Patient Advisory Module for HospitAI
 Provides health guidance based on environmental and disease conditions.
 """
 
+import numpy as np
 import streamlit as st
 
+from dashboard_state import OCCUPANCY_ADVISORY, OCCUPANCY_HIGH, OCCUPANCY_RISK_HIGH
 
-def show_advisory(df):
+
+# Risk level labels and icons, indexed by threshold bucket (0 = below both)
+RISK_LEVELS = ('Low', 'Moderate', 'High')
+RISK_ICONS = ('🟢', '🟡', '🔴')
+
+# Advisory bodies, built once at import instead of on every rerun
+AIR_QUALITY_ADVISORY = """
+**🌫️ Air Quality Alert ({severity})**
+- Consider wearing a mask outdoors
+- Limit strenuous outdoor activities
+- Keep windows closed if possible
+- Use air purifiers indoors
+"""
+
+FLU_ADVISORY = """
+**🤒 Flu Activity Elevated**
+- Practice frequent handwashing
+- Avoid close contact with sick individuals
+- Consider flu vaccination if not already vaccinated
+- Stay home if experiencing symptoms
+"""
+
+COLD_ADVISORY = """
+**🥶 Cold Weather Advisory**
+- Dress warmly in layers
+- Watch for signs of hypothermia
+- Check on elderly neighbors
+- Protect exposed skin
+"""
+
+HEAT_ADVISORY = """
+**🌡️ Heat Advisory**
+- Stay hydrated
+- Avoid prolonged sun exposure
+- Check on vulnerable individuals
+- Seek air-conditioned spaces
+"""
+
+CAPACITY_ADVISORY = """
+**🏥 Hospital Capacity Notice**
+- Emergency services may experience delays
+- Consider urgent care for non-critical issues
+- Have emergency contacts ready
+- Keep essential medications stocked
+"""
+
+WELLNESS_ADVISORY = """
+**✅ General Wellness Tips**
+- Maintain regular exercise routine
+- Eat a balanced diet
+- Get adequate sleep (7-9 hours)
+- Stay up to date with preventive care
+"""
+
+# Threshold bands for np.digitize. Pollution bins use right=True so a value
+# must exceed 100/150; the heat edge is nudged above 30 so only temperatures
+# strictly above 30 count as hot while anything below 10 counts as cold.
+POLLUTION_BINS = (100, 150)
+TEMPERATURE_BINS = (10, np.nextafter(30, np.inf))
+
+# Per-band lookups: air quality severity label and temperature advisory body
+AIR_QUALITY_SEVERITY = (None, "Moderate", "Unhealthy")
+TEMPERATURE_ADVISORIES = (COLD_ADVISORY, None, HEAT_ADVISORY)
+
+# Band used for a missing reading, which raises no advisory
+POLLUTION_NEUTRAL_BAND = 0
+TEMPERATURE_NEUTRAL_BAND = 1
+
+
+def _band(value, bins, neutral, right=False):
+    """Index of the threshold band holding ``value``, or ``neutral`` when it is NaN."""
+    # np.digitize places NaN above every edge, in the last band
+    if np.isnan(value):
+        return neutral
+    return int(np.digitize(value, bins, right=right))
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _compute_advisories(pollution, flu_cases, temperature, occupancy_ratio):
+    """
+    Decide which advisories apply to the given conditions.
+    
+    Kept free of Streamlit rendering so reruns with unchanged inputs hit the
+    cache and skip every threshold check.
+    
+    Returns:
+        list[tuple[str, str]]: (level, markdown body) pairs, where level is
+        the name of the Streamlit call used to render it
+    """
+    advisories = []
+    
+    # Air quality advisory
+    severity = AIR_QUALITY_SEVERITY[_band(pollution, POLLUTION_BINS, POLLUTION_NEUTRAL_BAND, right=True)]
+    if severity:
+        advisories.append(("info", AIR_QUALITY_ADVISORY.format(severity=severity)))
+    
+    # Flu advisory
+    if flu_cases > 50:
+        advisories.append(("info", FLU_ADVISORY))
+    
+    # Temperature advisory
+    body = TEMPERATURE_ADVISORIES[_band(temperature, TEMPERATURE_BINS, TEMPERATURE_NEUTRAL_BAND)]
+    if body:
+        advisories.append(("info", body))
+    
+    # Hospital capacity advisory
+    if occupancy_ratio > OCCUPANCY_ADVISORY:
+        advisories.append(("warning", CAPACITY_ADVISORY))
+    
+    return advisories
+
+
+def show_advisory(state):
     """
     Display patient health advisories based on current conditions.
     
@@ -16,125 +130,46 @@ def show_advisory(df):
     - General health tips during high-risk periods
     
     Args:
-        df (pd.DataFrame): Hospital and environmental data
+        state (DashboardState): Latest metrics from dashboard_state.extract_state
     """
-    # Get latest conditions
-    latest = df.iloc[-1]
-    
     st.subheader("💡 Health Advisories")
     
-    advisories_shown = False
+    # Pass plain floats so the cache key is cheap to hash
+    advisories = _compute_advisories(
+        float(state.pollution),
+        float(state.flu_cases),
+        float(state.temperature),
+        float(state.bed_ratio)
+    )
     
-    # Air quality advisory
-    if latest['pollution'] > 100:
-        severity = "Unhealthy" if latest['pollution'] > 150 else "Moderate"
-        st.info(f"""
-        **🌫️ Air Quality Alert ({severity})**
-        - Consider wearing a mask outdoors
-        - Limit strenuous outdoor activities
-        - Keep windows closed if possible
-        - Use air purifiers indoors
-        """)
-        advisories_shown = True
-    
-    # Flu advisory
-    if latest['flu_cases'] > 50:
-        st.info("""
-        **🤒 Flu Activity Elevated**
-        - Practice frequent handwashing
-        - Avoid close contact with sick individuals
-        - Consider flu vaccination if not already vaccinated
-        - Stay home if experiencing symptoms
-        """)
-        advisories_shown = True
-    
-    # Temperature advisory
-    if latest['temperature'] < 10:
-        st.info("""
-        **🥶 Cold Weather Advisory**
-        - Dress warmly in layers
-        - Watch for signs of hypothermia
-        - Check on elderly neighbors
-        - Protect exposed skin
-        """)
-        advisories_shown = True
-    elif latest['temperature'] > 30:
-        st.info("""
-        **🌡️ Heat Advisory**
-        - Stay hydrated
-        - Avoid prolonged sun exposure
-        - Check on vulnerable individuals
-        - Seek air-conditioned spaces
-        """)
-        advisories_shown = True
-    
-    # Hospital capacity advisory
-    occupancy_ratio = latest['occupied_beds'] / latest['total_beds']
-    if occupancy_ratio > 0.80:
-        st.warning("""
-        **🏥 Hospital Capacity Notice**
-        - Emergency services may experience delays
-        - Consider urgent care for non-critical issues
-        - Have emergency contacts ready
-        - Keep essential medications stocked
-        """)
-        advisories_shown = True
+    for level, body in advisories:
+        getattr(st, level)(body)
     
     # General wellness tip if no specific advisories
-    if not advisories_shown:
-        st.success("""
-        **✅ General Wellness Tips**
-        - Maintain regular exercise routine
-        - Eat a balanced diet
-        - Get adequate sleep (7-9 hours)
-        - Stay up to date with preventive care
-        """)
+    if not advisories:
+        st.success(WELLNESS_ADVISORY)
 
 
-def show_risk_summary(df):
+def show_risk_summary(state):
     """
     Display a summary of current risk factors.
     
     Args:
-        df (pd.DataFrame): Hospital data with risk metrics
+        state (DashboardState): Latest metrics from dashboard_state.extract_state
     """
-    latest = df.iloc[-1]
-    
     st.subheader("📊 Risk Factor Summary")
     
-    # Create risk assessment
-    risks = []
-    
-    # Pollution risk
-    if latest['pollution'] > 150:
-        risks.append(("High", "Air Quality", "🔴"))
-    elif latest['pollution'] > 100:
-        risks.append(("Moderate", "Air Quality", "🟡"))
-    else:
-        risks.append(("Low", "Air Quality", "🟢"))
-    
-    # Flu risk
-    if latest['flu_cases'] > 70:
-        risks.append(("High", "Flu Activity", "🔴"))
-    elif latest['flu_cases'] > 50:
-        risks.append(("Moderate", "Flu Activity", "🟡"))
-    else:
-        risks.append(("Low", "Flu Activity", "🟢"))
-    
-    # Capacity risk
-    occupancy = latest['occupied_beds'] / latest['total_beds']
-    if occupancy > 0.85:
-        risks.append(("High", "Hospital Capacity", "🔴"))
-    elif occupancy > 0.75:
-        risks.append(("Moderate", "Hospital Capacity", "🟡"))
-    else:
-        risks.append(("Low", "Hospital Capacity", "🟢"))
+    # Bucket each factor against its (moderate, high) thresholds; a value must
+    # exceed a threshold to move up a level, which matches searchsorted's left side
+    air = int(np.searchsorted((100, 150), state.pollution))
+    flu = int(np.searchsorted((50, 70), state.flu_cases))
+    capacity = int(np.searchsorted((OCCUPANCY_HIGH, OCCUPANCY_RISK_HIGH), state.bed_ratio))
     
     # Display in columns
-    cols = st.columns(len(risks))
-    for col, (level, factor, icon) in zip(cols, risks):
-        with col:
-            st.metric(label=f"{icon} {factor}", value=level)
+    col1, col2, col3 = st.columns(3)
+    col1.metric(label=f"{RISK_ICONS[air]} Air Quality", value=RISK_LEVELS[air])
+    col2.metric(label=f"{RISK_ICONS[flu]} Flu Activity", value=RISK_LEVELS[flu])
+    col3.metric(label=f"{RISK_ICONS[capacity]} Hospital Capacity", value=RISK_LEVELS[capacity])
 
 
 # Test the advisory functions
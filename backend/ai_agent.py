@@ -10,37 +10,94 @@ Agent Architecture:
 5. LEARNING - Track outcomes and improve
 """
 
-import os
 import json
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field, asdict
 from enum import Enum
-from dotenv import load_dotenv
+from itertools import chain, count
+from threading import Lock, Thread
+import numpy as np
 
-load_dotenv()
+from dashboard_state import compute_ratios
+from gpt_module import GEMINI_AVAILABLE, get_gemini_model
 
-# Try to import Gemini
-try:
-    import google.generativeai as genai
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
-    if GEMINI_API_KEY:
-        genai.configure(api_key=GEMINI_API_KEY)
-        GEMINI_AVAILABLE = True
-    else:
-        GEMINI_AVAILABLE = False
-except ImportError:
-    GEMINI_AVAILABLE = False
 
+def preload_gemini():
+    """Import the Gemini SDK in a background thread so the first analysis is not slow."""
+    if GEMINI_AVAILABLE:
+        Thread(target=get_gemini_model, daemon=True).start()
 
-class AlertLevel(Enum):
+
+# Prompt for the Gemini situation analysis, filled from the current situation
+ANALYSIS_PROMPT = """You are an AI hospital operations advisor. Analyze this situation and provide actionable recommendations.
+
+CURRENT HOSPITAL STATUS ({hospital_name}):
+- Bed Occupancy: {bed_occupancy}%
+- ICU Occupancy: {icu_occupancy}%
+- Ventilator Usage: {ventilator_usage}%
+- Staff-to-Patient Ratio: {staff_ratio}
+- Available Beds: {available_beds}
+- Available ICU: {available_icu}
+
+TRENDS:
+- 3-day bed change: {bed_change_3d} patients
+- Trend direction: {direction} ({velocity})
+
+ENVIRONMENTAL FACTORS:
+- Air Quality Index: {pollution_aqi}
+- Flu Cases: {flu_cases}
+
+IDENTIFIED ISSUES: {issue_count}
+{issue_lines}
+
+Provide:
+1. Overall situation assessment (1-2 sentences)
+2. Top 3 recommended actions with priority
+3. 24-hour outlook prediction
+4. Any early warning signs to monitor
+
+Keep response concise and actionable."""
+
+# Offline analysis used when Gemini is unavailable or fails
+FALLBACK_ANALYSIS = """## Hospital Status: {status}
+
+**Current Metrics:**
+- Bed Occupancy: {bed_occupancy}% ({available_beds} available)
+- ICU Occupancy: {icu_occupancy}% ({available_icu} available)
+- Staff Ratio: {staff_ratio:.2f}
+
+**Trend Analysis:**
+- Direction: {direction}
+- 3-day change: {bed_change_3d:+d} beds
+
+**Issues Detected:** {issue_count}
+{issue_lines}
+
+**24-Hour Outlook:** {outlook}"""
+
+# Fallback (status, outlook) indexed by how many of the 75% and 90% bed
+# occupancy levels are reached
+FALLBACK_STATUSES = (
+    ("🟢 STABLE", "Normal operations expected"),
+    ("🟡 ELEVATED", "Monitor closely, prepare contingency plans"),
+    ("🔴 CRITICAL", "High risk of capacity overflow within 24 hours")
+)
+
+
+class AlertLevel(str, Enum):
     INFO = "info"
     WARNING = "warning"
     CRITICAL = "critical"
     EMERGENCY = "emergency"
 
+    def __str__(self):
+        # Print as the plain value; otherwise f-strings show the member name on 3.11+
+        return self.value
+
 
-class ActionType(Enum):
+class ActionType(str, Enum):
     ALERT = "alert"
     RESOURCE_REQUEST = "resource_request"
     STAFF_CALL = "staff_call"
@@ -48,8 +105,11 @@ class ActionType(Enum):
     SUPPLY_ORDER = "supply_order"
     PROTOCOL_ACTIVATION = "protocol_activation"
 
+    def __str__(self):
+        return self.value
+
 
-@dataclass
+@dataclass(slots=True)
 class AgentAction:
     """Represents an action taken or recommended by the agent."""
     action_type: ActionType
@@ -60,9 +120,10 @@ class AgentAction:
     requires_approval: bool = True
     details: Dict = field(default_factory=dict)
     outcome: Optional[str] = None
+    id: Optional[int] = None  # Stable id, assigned when the agent records the action
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentThought:
     """Represents a step in the agent's reasoning chain."""
     step: str
@@ -70,14 +131,115 @@ class AgentThought:
     reasoning: str
     conclusion: str
     confidence: float  # 0-1
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())  # ISO 8601
+
+
+@dataclass(slots=True)
+class Trends:
+    """Bed, ICU and flu changes over recent days, with the bed trend's labels."""
+    bed_change_1d: int = 0
+    bed_change_3d: int = 0
+    bed_change_7d: int = 0
+    icu_change_3d: int = 0
+    flu_change_3d: int = 0
+    direction: str = 'stable'
+    velocity: str = 'slow'
+
+
+@dataclass(slots=True)
+class Environment:
+    """Environmental factors from the latest reading."""
+    pollution_aqi: float = 0.0
+    temperature: float = 20.0
+    flu_cases: int = 0
+
+
+@dataclass(slots=True)
+class Situation:
+    """The agent's perceived hospital state for one cycle."""
+    timestamp: str = ''
+    bed_occupancy: float = 0.0
+    icu_occupancy: float = 0.0
+    ventilator_usage: float = 0.0
+    staff_ratio: float = 1.0
+    total_beds: int = 0
+    occupied_beds: int = 0
+    available_beds: int = 0
+    total_icu: int = 0
+    occupied_icu: int = 0
+    available_icu: int = 0
+    trends: Trends = field(default_factory=Trends)
+    environment: Environment = field(default_factory=Environment)
+    risk_score: int = 0
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Capacity metrics keyed by name."""
+        return {name: getattr(self, name) for name in SITUATION_METRICS}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Nested dictionary form returned to the API and dashboard."""
+        return {
+            'timestamp': self.timestamp,
+            'metrics': self.metrics(),
+            'trends': asdict(self.trends),
+            'environment': asdict(self.environment),
+            'risk_score': self.risk_score
+        }
+
+
+# Situation fields reported under 'metrics'
+SITUATION_METRICS = ('bed_occupancy', 'icu_occupancy', 'ventilator_usage', 'staff_ratio',
+                     'total_beds', 'occupied_beds', 'available_beds',
+                     'total_icu', 'occupied_icu', 'available_icu')
+
+
+# Columns read by perception; each is pulled out of the DataFrame once per cycle
+PERCEPTION_COLUMNS = ('occupied_beds', 'total_beds', 'occupied_icu', 'total_icu_beds',
+                      'ventilators_used', 'total_ventilators', 'staff_on_duty',
+                      'pollution', 'temperature', 'flu_cases', 'risk_score')
+
+# Hospital data as one NumPy array per column, the form the agent works on
+HospitalData = Dict[str, np.ndarray]
+
+
+def to_hospital_data(df) -> HospitalData:
+    """Pull the columns the agent reads out of a DataFrame as NumPy arrays."""
+    return {col: df[col].to_numpy() for col in PERCEPTION_COLUMNS if col in df.columns}
+
+
+class IssueField(str):
+    """Names an issue field whose value is copied into an action's details."""
+
+
+# Scales the dashboard_state ratios to bed, ICU and ventilator occupancy (as
+# percentages) and staff per occupied bed
+RATIO_SCALES = np.array([100, 100, 100, 1])
+
+# Rows back from the latest reading for the 1-, 3- and 7-day bed changes
+TREND_LOOKBACKS = np.array([2, 3, 7])
+
+# Trend labels indexed by the sign of the 3-day bed change (-1, 0, +1 shifted
+# by one) and by how many of the 10- and 20-bed change bands it exceeds
+TREND_DIRECTIONS = ('decreasing', 'stable', 'increasing')
+TREND_VELOCITIES = ('slow', 'moderate', 'rapid')
+
+
+# Global agent state; the log and memory are ring buffers that drop their
+# oldest entries so a long-running server does not grow without bound
+AGENT_LOG_SIZE = 10000
+AGENT_MEMORY_SIZE = 1000
+AGENT_ACTION_HISTORY_SIZE = 500  # Per-agent taken actions; pending ones are never dropped
 
+# Cycles between forced re-evaluations of cached results; prime, so the refresh
+# does not line up with callers polling on round intervals
+CACHE_REFRESH_CYCLES = 131
 
-# Global agent state
-AGENT_LOG = []
+# Gemini analyses kept per agent, keyed by prompt, least recently used dropped first
+ANALYSIS_CACHE_SIZE = 128
+AGENT_LOG = deque(maxlen=AGENT_LOG_SIZE)
 AGENT_MEMORY = {
-    'past_predictions': [],
-    'action_outcomes': [],
+    'past_predictions': deque(maxlen=AGENT_MEMORY_SIZE),
+    'action_outcomes': deque(maxlen=AGENT_MEMORY_SIZE),
     'learned_patterns': []
 }
 
@@ -108,13 +270,115 @@ class HospitAIAgent:
         'aqi_critical': 150
     }
     
-    def __init__(self, hospital_name="City General Hospital", autonomous_mode=False):
+    # Metrics checked in reason(), in order: bed, ICU, ventilator, staff ratio, AQI, flu.
+    # Each is classified against a warning and a critical level in one comparison;
+    # single-level checks use the same value for both. The staff ratio is negated
+    # so its strict minimum becomes a >= check one ulp above the negated limit.
+    ISSUE_SIGNS = np.array([1, 1, 1, -1, 1, 1])
+    ISSUE_WARN = np.array([
+        THRESHOLDS['bed_occupancy_warning'], THRESHOLDS['icu_occupancy_warning'],
+        THRESHOLDS['ventilator_critical'], np.nextafter(-THRESHOLDS['staff_ratio_min'], np.inf),
+        THRESHOLDS['aqi_critical'], THRESHOLDS['flu_surge_threshold']
+    ])
+    ISSUE_CRIT = np.array([
+        THRESHOLDS['bed_occupancy_critical'], THRESHOLDS['icu_occupancy_critical'],
+        THRESHOLDS['ventilator_critical'], np.nextafter(-THRESHOLDS['staff_ratio_min'], np.inf),
+        THRESHOLDS['aqi_critical'], THRESHOLDS['flu_surge_threshold']
+    ])
+    
+    # (type, resource, severity, message template) per metric at the warning and
+    # critical level; single-level checks only fire at the critical level
+    ISSUE_RULES = (
+        (('capacity_warning', 'beds', AlertLevel.WARNING,
+          "WARNING: Bed occupancy at {value}% - prepare contingency"),
+         ('capacity_critical', 'beds', AlertLevel.EMERGENCY,
+          "CRITICAL: Bed occupancy at {value}% - immediate action required")),
+        (('capacity_warning', 'icu', AlertLevel.WARNING,
+          "WARNING: ICU at {value}% - monitor closely"),
+         ('capacity_critical', 'icu', AlertLevel.EMERGENCY,
+          "CRITICAL: ICU at {value}% capacity")),
+        (None,
+         ('equipment_critical', 'ventilators', AlertLevel.CRITICAL,
+          "CRITICAL: Ventilator usage at {value}%")),
+        (None,
+         ('staffing_shortage', 'staff', AlertLevel.CRITICAL,
+          "CRITICAL: Staff ratio {value:.2f} below minimum {minimum}")),
+        (None,
+         ('environmental_alert', 'air_quality', AlertLevel.WARNING,
+          "High AQI ({value}) - expect respiratory admissions increase")),
+        (None,
+         ('disease_surge', 'flu', AlertLevel.WARNING,
+          "Flu surge detected: {value} cases"))
+    )
+    
+    # Actions planned for each (issue type, resource), in order, as (action type,
+    # description, priority, requires approval, auto-executed, details). None for
+    # approval or auto-execution follows the autonomy setting, '{message}' in a
+    # description is the issue message, and IssueField details come from the
+    # issue. Each action gets its own details dict; shared values are tuples so
+    # no action can change the table.
+    ACTION_TABLE = {
+        ('capacity_critical', 'beds'): (
+            (ActionType.DIVERSION, "Activate ambulance diversion protocol", 5, None, False,
+             {'reason': IssueField('message'), 'duration_hours': 4}),
+            (ActionType.PROTOCOL_ACTIVATION, "Activate surge capacity protocol - open overflow areas", 5, True, False,
+             {'protocol': 'SURGE_LEVEL_3'})
+        ),
+        ('capacity_warning', 'beds'): (
+            (ActionType.ALERT, "Alert bed management team - high occupancy", 3, False, None,
+             {'recipients': ('bed_management', 'nursing_supervisor')}),
+            (ActionType.RESOURCE_REQUEST, "Request discharge planning review for eligible patients", 3, False, False,
+             {'target': 'case_management'})
+        ),
+        ('capacity_critical', 'icu'): (
+            (ActionType.ALERT, "URGENT: ICU at critical capacity", 5, False, True,
+             {'recipients': ('icu_director', 'cmo', 'bed_management')}),
+            (ActionType.RESOURCE_REQUEST, "Request ICU step-down evaluations", 4, False, False,
+             {'target': 'icu_team'})
+        ),
+        ('staffing_shortage', 'staff'): (
+            (ActionType.STAFF_CALL, "Initiate emergency staff callback", 4, None, False,
+             {'type': 'callback', 'departments': ('nursing', 'respiratory')}),
+            (ActionType.ALERT, "Alert staffing office - critical shortage", 4, False, True,
+             {'recipients': ('staffing_office', 'nursing_director')})
+        ),
+        ('equipment_critical', 'ventilators'): (
+            (ActionType.SUPPLY_ORDER, "Request emergency ventilator allocation from regional pool", 5, True, False,
+             {'equipment': 'ventilators', 'quantity': 5}),
+        ),
+        ('environmental_alert', 'air_quality'): (
+            (ActionType.ALERT, "Environmental alert: {message}", 2, False, True,
+             {'type': 'environmental', 'aqi': IssueField('value')}),
+        ),
+        ('disease_surge', 'flu'): (
+            (ActionType.PROTOCOL_ACTIVATION, "Consider activating flu surge protocol", 3, True, False,
+             {'protocol': 'FLU_SURGE', 'cases': IssueField('value')}),
+        ),
+        ('trend_alert', 'capacity'): (
+            (ActionType.ALERT, "Trend alert: Rapid admission increase detected", 3, False, True,
+             {'trend': IssueField('value')}),
+        )
+    }
+    
+    def __init__(self, hospital_name="City General Hospital", autonomous_mode=False, trace_enabled=True):
         self.hospital_name = hospital_name
         self.autonomous_mode = autonomous_mode
-        self.actions_taken: List[AgentAction] = []
-        self.pending_actions: List[AgentAction] = []
+        self.trace_enabled = trace_enabled  # Record reasoning thoughts each cycle
+        self.actions_taken: deque = deque(maxlen=AGENT_ACTION_HISTORY_SIZE)
+        self.pending_actions: Dict[int, AgentAction] = {}  # By action id, oldest first
+        self._action_ids = count(1)
         self.reasoning_chain: List[AgentThought] = []
-        self.current_situation: Dict = {}
+        self.current_situation: Optional[Situation] = None
+        self._cycle_time: Optional[datetime] = None
+        self._cycle_iso: Optional[str] = None
+        self._cycle_count = 0
+        self._issue_key: Optional[tuple] = None
+        self._issues: List[Dict[str, Any]] = []
+        self._analyses: OrderedDict = OrderedDict()
+        self._analyses_lock = Lock()  # Analyses run on the event loop and in worker threads
+        self._result_key: Optional[tuple] = None
+        self._result: Dict[str, Any] = {}
+        self._result_thoughts: tuple = ()
         self.goals = [
             "Maintain patient safety",
             "Optimize resource utilization",
@@ -123,46 +387,53 @@ class HospitAIAgent:
             "Minimize response time to surges"
         ]
         
-    def perceive(self, df) -> Dict[str, Any]:
+    def perceive(self, data) -> Situation:
         """
         PERCEPTION: Gather and process current hospital state.
+        Accepts HospitalData, or a DataFrame which is converted on entry.
         """
-        latest = df.iloc[-1]
-        
-        # Calculate key metrics - convert to native Python types
-        bed_occupancy = float((latest['occupied_beds'] / latest['total_beds']) * 100)
-        icu_occupancy = float((latest['occupied_icu'] / latest['total_icu_beds']) * 100)
-        vent_usage = float((latest['ventilators_used'] / latest['total_ventilators']) * 100)
-        staff_ratio = float(latest['staff_on_duty'] / max(latest['occupied_beds'], 1))
+        # The latest values and all trend lookbacks index the column arrays directly
+        arrs = data if isinstance(data, dict) else to_hospital_data(data)
+        latest = {col: arr[-1] for col, arr in arrs.items()}
+        
+        # Calculate bed, ICU and ventilator occupancy (%) and staff ratio with the
+        # dashboard's shared divide, rounding and converting to native Python types in bulk
+        numerators, denominators, ratios = compute_ratios(latest, min_patients=1)
+        ratios = ratios * RATIO_SCALES
+        bed_occupancy, icu_occupancy, vent_usage = np.round(ratios[:3], 1).tolist()
+        # Python's round resolves exact decimal ties, which the staff minimum can hit
+        staff_ratio = round(ratios[3].item(), 3)
+        
+        # Bed and ICU counts come from the same arrays
+        occupied_beds, occupied_icu = numerators[:2].astype(int).tolist()
+        total_beds, total_icu = denominators[:2].astype(int).tolist()
         
         # Trend analysis
-        trends = self._calculate_trends(df)
+        trends = self._calculate_trends(arrs)
         
         # Environmental factors - convert to native types
-        env_factors = {
-            'pollution_aqi': float(latest.get('pollution', 0)),
-            'temperature': float(latest.get('temperature', 20)),
-            'flu_cases': int(latest.get('flu_cases', 0))
-        }
+        env_factors = Environment(
+            pollution_aqi=float(latest.get('pollution', 0)),
+            temperature=float(latest.get('temperature', 20)),
+            flu_cases=int(latest.get('flu_cases', 0))
+        )
         
-        self.current_situation = {
-            'timestamp': datetime.now().isoformat(),
-            'metrics': {
-                'bed_occupancy': float(round(bed_occupancy, 1)),
-                'icu_occupancy': float(round(icu_occupancy, 1)),
-                'ventilator_usage': float(round(vent_usage, 1)),
-                'staff_ratio': float(round(staff_ratio, 3)),
-                'total_beds': int(latest['total_beds']),
-                'occupied_beds': int(latest['occupied_beds']),
-                'available_beds': int(latest['total_beds'] - latest['occupied_beds']),
-                'total_icu': int(latest['total_icu_beds']),
-                'occupied_icu': int(latest['occupied_icu']),
-                'available_icu': int(latest['total_icu_beds'] - latest['occupied_icu'])
-            },
-            'trends': trends,
-            'environment': env_factors,
-            'risk_score': int(latest.get('risk_score', 0))
-        }
+        self.current_situation = Situation(
+            timestamp=self._timestamp_iso(),
+            bed_occupancy=bed_occupancy,
+            icu_occupancy=icu_occupancy,
+            ventilator_usage=vent_usage,
+            staff_ratio=staff_ratio,
+            total_beds=total_beds,
+            occupied_beds=occupied_beds,
+            available_beds=total_beds - occupied_beds,
+            total_icu=total_icu,
+            occupied_icu=occupied_icu,
+            available_icu=total_icu - occupied_icu,
+            trends=trends,
+            environment=env_factors,
+            risk_score=int(latest.get('risk_score', 0))
+        )
         
         self._add_thought(
             step="PERCEPTION",
@@ -174,143 +445,99 @@ class HospitAIAgent:
         
         return self.current_situation
     
-    def _calculate_trends(self, df) -> Dict[str, Any]:
-        """Calculate trends from historical data."""
-        trends = {
-            'bed_change_1d': 0, 'bed_change_3d': 0, 'bed_change_7d': 0,
-            'icu_change_3d': 0, 'flu_change_3d': 0,
-            'direction': 'stable', 'velocity': 'slow'
-        }
-        
-        if len(df) >= 2:
-            trends['bed_change_1d'] = int(df['occupied_beds'].iloc[-1] - df['occupied_beds'].iloc[-2])
-        if len(df) >= 3:
-            trends['bed_change_3d'] = int(df['occupied_beds'].iloc[-1] - df['occupied_beds'].iloc[-3])
-            trends['icu_change_3d'] = int(df['occupied_icu'].iloc[-1] - df['occupied_icu'].iloc[-3])
-            trends['flu_change_3d'] = int(df['flu_cases'].iloc[-1] - df['flu_cases'].iloc[-3])
-        if len(df) >= 7:
-            trends['bed_change_7d'] = int(df['occupied_beds'].iloc[-1] - df['occupied_beds'].iloc[-7])
-        
-        # Determine direction and velocity
-        if trends['bed_change_3d'] > 10:
-            trends['direction'] = 'increasing'
-            trends['velocity'] = 'rapid' if trends['bed_change_3d'] > 20 else 'moderate'
-        elif trends['bed_change_3d'] < -10:
-            trends['direction'] = 'decreasing'
-            trends['velocity'] = 'rapid' if trends['bed_change_3d'] < -20 else 'moderate'
-            
-        return trends
+    def _calculate_trends(self, arrs: Dict[str, np.ndarray]) -> Trends:
+        """Calculate trends from historical column arrays."""
+        beds = arrs['occupied_beds']
+        icu = arrs['occupied_icu']
+        flu = arrs['flu_cases']
+        n = len(beds)
+        
+        # All bed lookbacks in one subtraction; changes without enough history are 0
+        bed_changes = np.where(
+            n >= TREND_LOOKBACKS,
+            beds[-1] - beds[-np.minimum(TREND_LOOKBACKS, n)],
+            0
+        )
+        bed_change_1d, bed_change_3d, bed_change_7d = bed_changes.tolist()
+        
+        # Direction and velocity looked up from the 3-day change without branching
+        sign = (bed_change_3d > 10) - (bed_change_3d < -10)
+        rapid = abs(bed_change_3d) > 20
+        
+        return Trends(
+            bed_change_1d=bed_change_1d,
+            bed_change_3d=bed_change_3d,
+            bed_change_7d=bed_change_7d,
+            icu_change_3d=int(icu[-1] - icu[-3]) if n >= 3 else 0,
+            flu_change_3d=int(flu[-1] - flu[-3]) if n >= 3 else 0,
+            direction=TREND_DIRECTIONS[sign + 1],
+            velocity=TREND_VELOCITIES[(sign != 0) + rapid]
+        )
     
     def reason(self) -> List[Dict[str, Any]]:
         """
         REASONING: Analyze situation and identify issues/opportunities.
         Returns list of identified issues with severity.
         """
-        issues = []
-        metrics = self.current_situation.get('metrics', {})
-        trends = self.current_situation.get('trends', {})
-        env = self.current_situation.get('environment', {})
-        
-        # Check bed capacity
-        bed_occ = metrics.get('bed_occupancy', 0)
-        if bed_occ >= self.THRESHOLDS['bed_occupancy_critical']:
-            issues.append({
-                'type': 'capacity_critical',
-                'resource': 'beds',
-                'severity': AlertLevel.EMERGENCY,
-                'value': bed_occ,
-                'message': f"CRITICAL: Bed occupancy at {bed_occ}% - immediate action required"
-            })
-        elif bed_occ >= self.THRESHOLDS['bed_occupancy_warning']:
-            issues.append({
-                'type': 'capacity_warning',
-                'resource': 'beds',
-                'severity': AlertLevel.WARNING,
-                'value': bed_occ,
-                'message': f"WARNING: Bed occupancy at {bed_occ}% - prepare contingency"
-            })
-        
-        # Check ICU capacity
-        icu_occ = metrics.get('icu_occupancy', 0)
-        if icu_occ >= self.THRESHOLDS['icu_occupancy_critical']:
-            issues.append({
-                'type': 'capacity_critical',
-                'resource': 'icu',
-                'severity': AlertLevel.EMERGENCY,
-                'value': icu_occ,
-                'message': f"CRITICAL: ICU at {icu_occ}% capacity"
-            })
-        elif icu_occ >= self.THRESHOLDS['icu_occupancy_warning']:
-            issues.append({
-                'type': 'capacity_warning',
-                'resource': 'icu',
-                'severity': AlertLevel.WARNING,
-                'value': icu_occ,
-                'message': f"WARNING: ICU at {icu_occ}% - monitor closely"
-            })
+        situation = self.current_situation or Situation()
+        trends = situation.trends
+        
+        values = (
+            situation.bed_occupancy,
+            situation.icu_occupancy,
+            situation.ventilator_usage,
+            situation.staff_ratio,
+            situation.environment.pollution_aqi,
+            situation.environment.flu_cases
+        )
         
-        # Check ventilators
-        vent_usage = metrics.get('ventilator_usage', 0)
-        if vent_usage >= self.THRESHOLDS['ventilator_critical']:
-            issues.append({
-                'type': 'equipment_critical',
-                'resource': 'ventilators',
-                'severity': AlertLevel.CRITICAL,
-                'value': vent_usage,
-                'message': f"CRITICAL: Ventilator usage at {vent_usage}%"
-            })
+        # Metrics arrive already rounded by perceive(), so consecutive cycles often
+        # repeat exactly; reuse the previous issues when nothing they depend on changed
+        key = (values, trends.direction, trends.velocity, trends.bed_change_3d)
+        if key == self._issue_key:
+            issues = list(self._issues)
+        else:
+            issues = self._identify_issues(values, trends)
+            self._issue_key, self._issues = key, list(issues)
         
-        # Check staffing
-        staff_ratio = metrics.get('staff_ratio', 1)
-        if staff_ratio < self.THRESHOLDS['staff_ratio_min']:
-            issues.append({
-                'type': 'staffing_shortage',
-                'resource': 'staff',
-                'severity': AlertLevel.CRITICAL,
-                'value': staff_ratio,
-                'message': f"CRITICAL: Staff ratio {staff_ratio:.2f} below minimum {self.THRESHOLDS['staff_ratio_min']}"
-            })
+        self._add_thought(
+            step="REASONING",
+            observation=f"Identified {len(issues)} potential issues",
+            reasoning="Compared current metrics against thresholds and analyzed trends",
+            conclusion=f"Issues found: {[i['type'] for i in issues]}" if issues else "No critical issues detected",
+            confidence=0.85
+        )
         
-        # Check environmental factors
-        aqi = env.get('pollution_aqi', 0)
-        if aqi >= self.THRESHOLDS['aqi_critical']:
-            issues.append({
-                'type': 'environmental_alert',
-                'resource': 'air_quality',
-                'severity': AlertLevel.WARNING,
-                'value': aqi,
-                'message': f"High AQI ({aqi}) - expect respiratory admissions increase"
-            })
+        return issues
+    
+    def _identify_issues(self, values: tuple, trends: Trends) -> List[Dict[str, Any]]:
+        """Build issue dicts for the metric values and trends that crossed a threshold."""
+        # Classify every metric at once: 0 = normal, 1 = warning, 2 = critical
+        checked = np.array(values, dtype=float) * self.ISSUE_SIGNS
+        levels = (checked >= self.ISSUE_WARN).astype(np.int8) + (checked >= self.ISSUE_CRIT)
         
-        # Check flu surge
-        flu = env.get('flu_cases', 0)
-        if flu >= self.THRESHOLDS['flu_surge_threshold']:
+        # Build issue dicts only for the metrics that crossed a threshold
+        issues = []
+        for i in np.flatnonzero(levels):
+            issue_type, resource, severity, template = self.ISSUE_RULES[i][levels[i] - 1]
             issues.append({
-                'type': 'disease_surge',
-                'resource': 'flu',
-                'severity': AlertLevel.WARNING,
-                'value': flu,
-                'message': f"Flu surge detected: {flu} cases"
+                'type': issue_type,
+                'resource': resource,
+                'severity': severity,
+                'value': values[i],
+                'message': template.format(value=values[i], minimum=self.THRESHOLDS['staff_ratio_min'])
             })
         
         # Trend-based predictions
-        if trends.get('direction') == 'increasing' and trends.get('velocity') == 'rapid':
+        if trends.direction == 'increasing' and trends.velocity == 'rapid':
             issues.append({
                 'type': 'trend_alert',
                 'resource': 'capacity',
                 'severity': AlertLevel.WARNING,
-                'value': trends.get('bed_change_3d', 0),
-                'message': f"Rapid increase in admissions: +{trends.get('bed_change_3d', 0)} beds in 3 days"
+                'value': trends.bed_change_3d,
+                'message': f"Rapid increase in admissions: +{trends.bed_change_3d} beds in 3 days"
             })
         
-        self._add_thought(
-            step="REASONING",
-            observation=f"Identified {len(issues)} potential issues",
-            reasoning="Compared current metrics against thresholds and analyzed trends",
-            conclusion=f"Issues found: {[i['type'] for i in issues]}" if issues else "No critical issues detected",
-            confidence=0.85
-        )
-        
         return issues
     
     def plan(self, issues: List[Dict]) -> List[AgentAction]:
@@ -318,118 +545,31 @@ class HospitAIAgent:
         PLANNING: Generate action plan based on identified issues.
         """
         actions = []
+        timestamp = self._timestamp()
         
         for issue in issues:
-            severity = issue['severity']
-            issue_type = issue['type']
-            
-            if issue_type == 'capacity_critical' and issue['resource'] == 'beds':
-                actions.append(AgentAction(
-                    action_type=ActionType.DIVERSION,
-                    description="Activate ambulance diversion protocol",
-                    priority=5,
-                    requires_approval=not self.autonomous_mode,
-                    details={'reason': issue['message'], 'duration_hours': 4}
-                ))
-                actions.append(AgentAction(
-                    action_type=ActionType.PROTOCOL_ACTIVATION,
-                    description="Activate surge capacity protocol - open overflow areas",
-                    priority=5,
-                    requires_approval=True,
-                    details={'protocol': 'SURGE_LEVEL_3'}
-                ))
-                
-            elif issue_type == 'capacity_warning' and issue['resource'] == 'beds':
-                actions.append(AgentAction(
-                    action_type=ActionType.ALERT,
-                    description="Alert bed management team - high occupancy",
-                    priority=3,
-                    requires_approval=False,
-                    auto_executed=self.autonomous_mode,
-                    details={'recipients': ['bed_management', 'nursing_supervisor']}
-                ))
-                actions.append(AgentAction(
-                    action_type=ActionType.RESOURCE_REQUEST,
-                    description="Request discharge planning review for eligible patients",
-                    priority=3,
-                    requires_approval=False,
-                    details={'target': 'case_management'}
-                ))
-                
-            elif issue_type == 'capacity_critical' and issue['resource'] == 'icu':
+            for action_type, description, priority, approval, auto, details in self.ACTION_TABLE.get(
+                (issue['type'], issue['resource']), ()
+            ):
                 actions.append(AgentAction(
-                    action_type=ActionType.ALERT,
-                    description="URGENT: ICU at critical capacity",
-                    priority=5,
-                    requires_approval=False,
-                    auto_executed=True,
-                    details={'recipients': ['icu_director', 'cmo', 'bed_management']}
-                ))
-                actions.append(AgentAction(
-                    action_type=ActionType.RESOURCE_REQUEST,
-                    description="Request ICU step-down evaluations",
-                    priority=4,
-                    requires_approval=False,
-                    details={'target': 'icu_team'}
-                ))
-                
-            elif issue_type == 'staffing_shortage':
-                actions.append(AgentAction(
-                    action_type=ActionType.STAFF_CALL,
-                    description="Initiate emergency staff callback",
-                    priority=4,
-                    requires_approval=not self.autonomous_mode,
-                    details={'type': 'callback', 'departments': ['nursing', 'respiratory']}
-                ))
-                actions.append(AgentAction(
-                    action_type=ActionType.ALERT,
-                    description="Alert staffing office - critical shortage",
-                    priority=4,
-                    requires_approval=False,
-                    auto_executed=True,
-                    details={'recipients': ['staffing_office', 'nursing_director']}
-                ))
-                
-            elif issue_type == 'equipment_critical':
-                actions.append(AgentAction(
-                    action_type=ActionType.SUPPLY_ORDER,
-                    description="Request emergency ventilator allocation from regional pool",
-                    priority=5,
-                    requires_approval=True,
-                    details={'equipment': 'ventilators', 'quantity': 5}
-                ))
-                
-            elif issue_type == 'environmental_alert':
-                actions.append(AgentAction(
-                    action_type=ActionType.ALERT,
-                    description=f"Environmental alert: {issue['message']}",
-                    priority=2,
-                    requires_approval=False,
-                    auto_executed=True,
-                    details={'type': 'environmental', 'aqi': issue['value']}
-                ))
-                
-            elif issue_type == 'disease_surge':
-                actions.append(AgentAction(
-                    action_type=ActionType.PROTOCOL_ACTIVATION,
-                    description="Consider activating flu surge protocol",
-                    priority=3,
-                    requires_approval=True,
-                    details={'protocol': 'FLU_SURGE', 'cases': issue['value']}
-                ))
-                
-            elif issue_type == 'trend_alert':
-                actions.append(AgentAction(
-                    action_type=ActionType.ALERT,
-                    description="Trend alert: Rapid admission increase detected",
-                    priority=3,
-                    requires_approval=False,
-                    auto_executed=True,
-                    details={'trend': issue['value']}
+                    action_type=action_type,
+                    description=description.format(message=issue['message']),
+                    priority=priority,
+                    timestamp=timestamp,
+                    requires_approval=not self.autonomous_mode if approval is None else approval,
+                    auto_executed=self.autonomous_mode if auto is None else auto,
+                    details={
+                        key: issue[value] if isinstance(value, IssueField) else value
+                        for key, value in details.items()
+                    }
                 ))
         
-        # Sort by priority
-        actions.sort(key=lambda x: x.priority, reverse=True)
+        # Order by priority, highest first, keeping plan order within a priority;
+        # priorities are 1-5 so one bucket pass replaces the comparison sort
+        buckets = [[] for _ in range(6)]
+        for action in actions:
+            buckets[action.priority].append(action)
+        actions = list(chain.from_iterable(reversed(buckets)))
         
         self._add_thought(
             step="PLANNING",
@@ -447,24 +587,29 @@ class HospitAIAgent:
         """
         executed = []
         pending = []
+        timestamp = self._timestamp_iso()
         
         for action in actions:
+            action.id = next(self._action_ids)
             if action.auto_executed or (self.autonomous_mode and not action.requires_approval):
                 # Auto-execute
                 action.auto_executed = True
                 action.outcome = "Executed automatically"
                 executed.append(action)
-                self.actions_taken.append(action)
-                AGENT_LOG.append({
-                    'timestamp': datetime.now().isoformat(),
-                    'action': action.description,
-                    'type': action.action_type.value,
-                    'auto': True
-                })
             else:
                 # Queue for approval
                 pending.append(action)
-                self.pending_actions.append(action)
+        
+        # Record the whole batch at once so concurrent readers never see a
+        # partially logged cycle
+        self.actions_taken.extend(executed)
+        self.pending_actions.update((action.id, action) for action in pending)
+        AGENT_LOG.extend([{
+            'timestamp': timestamp,
+            'action': action.description,
+            'type': action.action_type,
+            'auto': True
+        } for action in executed])
         
         self._add_thought(
             step="EXECUTION",
@@ -480,137 +625,195 @@ class HospitAIAgent:
             'total_actions': len(actions)
         }
     
-    def run_cycle(self, df) -> Dict[str, Any]:
+    def run_cycle(self, data) -> Dict[str, Any]:
         """
         Run a complete agent cycle: Perceive -> Reason -> Plan -> Execute
-        """
-        self.reasoning_chain = []  # Reset for new cycle
-        
-        # 1. PERCEIVE
-        situation = self.perceive(df)
-        
-        # 2. REASON
-        issues = self.reason()
         
-        # 3. PLAN
-        actions = self.plan(issues)
+        Repeating a cycle on unchanged data returns the previous result without
+        re-queuing its actions, unless an action was approved or rejected since.
+        """
+        # Periodically drop the cached issues and analyses so they are recomputed;
+        # the cached result stays, since rebuilding it would re-queue its actions
+        self._cycle_count += 1
+        if self._cycle_count % CACHE_REFRESH_CYCLES == 0:
+            self._issue_key = None
+            with self._analyses_lock:
+                self._analyses.clear()
+        
+        data = data if isinstance(data, dict) else to_hospital_data(data)
+        key = self._cycle_key(data)
+        if key == self._result_key:
+            self.reasoning_chain = list(self._result_thoughts)
+            return self._result
         
-        # 4. EXECUTE
-        results = self.execute(actions)
+        self.reasoning_chain = []  # Reset for new cycle
         
-        # Store in memory for learning
-        AGENT_MEMORY['past_predictions'].append({
-            'timestamp': datetime.now().isoformat(),
-            'situation': situation,
-            'issues': len(issues),
-            'actions': len(actions)
-        })
+        # Read the clock once; every thought, action and log entry of this cycle
+        # shares the timestamp
+        self._cycle_time = datetime.now()
+        self._cycle_iso = self._cycle_time.isoformat()
+        try:
+            # 1. PERCEIVE
+            situation = self.perceive(data)
+            
+            # 2. REASON
+            issues = self.reason()
+            
+            # 3. PLAN
+            actions = self.plan(issues)
+            
+            # 4. EXECUTE
+            results = self.execute(actions)
+            
+            # Store in memory for learning
+            situation_dict = situation.to_dict()
+            AGENT_MEMORY['past_predictions'].append({
+                'timestamp': situation.timestamp,
+                'situation': situation_dict,
+                'issues': len(issues),
+                'actions': len(actions)
+            })
+        finally:
+            self._cycle_time = self._cycle_iso = None
         
-        return {
-            'situation': situation,
+        self._result_key = key
+        self._result_thoughts = tuple(self.reasoning_chain)
+        self._result = {
+            'situation': situation_dict,
             'issues': issues,
             'actions': results,
             'reasoning_chain': [self._thought_to_dict(t) for t in self.reasoning_chain]
         }
+        return self._result
+    
+    def _cycle_key(self, data: HospitalData) -> tuple:
+        """Everything a cycle's result depends on: the settings and the rows perception reads."""
+        window = TREND_LOOKBACKS[-1]
+        return (
+            self.autonomous_mode,
+            self.trace_enabled,
+            len(data['occupied_beds']),
+            tuple(tuple(arr[-window:].tolist()) for arr in data.values())
+        )
     
-    def get_ai_analysis(self, df) -> str:
+    def _analysis_prompt(self, situation: Situation, issues: List) -> str:
+        """Fill the analysis prompt template from a situation and its issues."""
+        return ANALYSIS_PROMPT.format(
+            hospital_name=self.hospital_name,
+            **situation.metrics(),
+            **asdict(situation.trends),
+            **asdict(situation.environment),
+            issue_count=len(issues),
+            issue_lines="\n".join(f"- {i['message']}" for i in issues) if issues else "- No critical issues"
+        )
+    
+    def get_ai_analysis(self, data) -> str:
         """
         Get detailed AI analysis using Gemini if available.
         """
-        situation = self.current_situation or self.perceive(df)
-        issues = self.reason()
+        return self._analyze(*self.get_analysis_inputs(data))
+    
+    def get_analysis_inputs(self, data) -> Tuple[Situation, List]:
+        """
+        Read the situation and issues an analysis is built from.
+        Callers sharing the agent across threads take this snapshot under their
+        lock and can then run the analysis itself without holding it.
+        """
+        situation = self.current_situation or self.perceive(data)
+        return situation, self.reason()
+    
+    def _analyze(self, situation: Situation, issues: List) -> str:
+        """Analyze a situation with Gemini, falling back to the offline analysis."""
+        prompt, analysis = self._begin_analysis(situation, issues)
+        if analysis is not None:
+            return analysis
         
-        if not GEMINI_AVAILABLE:
+        try:
+            return self._cache_analysis(prompt, get_gemini_model().generate_content(prompt).text)
+        except Exception as e:
             return self._generate_fallback_analysis(situation, issues)
+    
+    async def analyze_async(self, situation: Situation, issues: List) -> str:
+        """
+        Analyze a situation without blocking the event loop while Gemini responds.
+        """
+        prompt, analysis = self._begin_analysis(situation, issues)
+        if analysis is not None:
+            return analysis
         
         try:
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
-            prompt = f"""You are an AI hospital operations advisor. Analyze this situation and provide actionable recommendations.
-
-CURRENT HOSPITAL STATUS ({self.hospital_name}):
-- Bed Occupancy: {situation['metrics']['bed_occupancy']}%
-- ICU Occupancy: {situation['metrics']['icu_occupancy']}%
-- Ventilator Usage: {situation['metrics']['ventilator_usage']}%
-- Staff-to-Patient Ratio: {situation['metrics']['staff_ratio']}
-- Available Beds: {situation['metrics']['available_beds']}
-- Available ICU: {situation['metrics']['available_icu']}
-
-TRENDS:
-- 3-day bed change: {situation['trends']['bed_change_3d']} patients
-- Trend direction: {situation['trends']['direction']} ({situation['trends']['velocity']})
-
-ENVIRONMENTAL FACTORS:
-- Air Quality Index: {situation['environment']['pollution_aqi']}
-- Flu Cases: {situation['environment']['flu_cases']}
-
-IDENTIFIED ISSUES: {len(issues)}
-{chr(10).join([f"- {i['message']}" for i in issues]) if issues else "- No critical issues"}
-
-Provide:
-1. Overall situation assessment (1-2 sentences)
-2. Top 3 recommended actions with priority
-3. 24-hour outlook prediction
-4. Any early warning signs to monitor
-
-Keep response concise and actionable."""
-
-            response = model.generate_content(prompt)
-            return response.text
-            
+            response = await get_gemini_model().generate_content_async(prompt)
+            return self._cache_analysis(prompt, response.text)
         except Exception as e:
             return self._generate_fallback_analysis(situation, issues)
     
-    def _generate_fallback_analysis(self, situation: Dict, issues: List) -> str:
-        """Generate analysis without AI API."""
-        metrics = situation.get('metrics', {})
-        trends = situation.get('trends', {})
-        
-        # Determine overall status
-        bed_occ = metrics.get('bed_occupancy', 0)
-        if bed_occ >= 90:
-            status = "🔴 CRITICAL"
-            outlook = "High risk of capacity overflow within 24 hours"
-        elif bed_occ >= 75:
-            status = "🟡 ELEVATED"
-            outlook = "Monitor closely, prepare contingency plans"
-        else:
-            status = "🟢 STABLE"
-            outlook = "Normal operations expected"
-        
-        analysis = f"""## Hospital Status: {status}
-
-**Current Metrics:**
-- Bed Occupancy: {bed_occ}% ({metrics.get('available_beds', 0)} available)
-- ICU Occupancy: {metrics.get('icu_occupancy', 0)}% ({metrics.get('available_icu', 0)} available)
-- Staff Ratio: {metrics.get('staff_ratio', 0):.2f}
-
-**Trend Analysis:**
-- Direction: {trends.get('direction', 'stable').title()}
-- 3-day change: {trends.get('bed_change_3d', 0):+d} beds
-
-**Issues Detected:** {len(issues)}
-"""
-        if issues:
-            for issue in issues[:3]:
-                analysis += f"- {issue['message']}\n"
-        else:
-            analysis += "- No critical issues at this time\n"
-        
-        analysis += f"\n**24-Hour Outlook:** {outlook}"
-        
+    def _begin_analysis(self, situation: Situation, issues: List) -> Tuple[str, Optional[str]]:
+        """
+        Return the Gemini prompt and, when no Gemini call is needed, the analysis:
+        the cached one for this prompt, or the offline one without Gemini.
+        """
+        if not GEMINI_AVAILABLE:
+            return "", self._generate_fallback_analysis(situation, issues)
+        prompt = self._analysis_prompt(situation, issues)
+        return prompt, self._cached_analysis(prompt)
+    
+    def _cached_analysis(self, prompt: str) -> Optional[str]:
+        """Return the Gemini analysis previously generated for this prompt, if any."""
+        with self._analyses_lock:
+            analysis = self._analyses.get(prompt)
+            if analysis is not None:
+                self._analyses.move_to_end(prompt)
         return analysis
     
+    def _cache_analysis(self, prompt: str, analysis: str) -> str:
+        """Remember a Gemini analysis, evicting the least recently used one when full."""
+        with self._analyses_lock:
+            self._analyses[prompt] = analysis
+            if len(self._analyses) > ANALYSIS_CACHE_SIZE:
+                self._analyses.popitem(last=False)
+        return analysis
+    
+    def _generate_fallback_analysis(self, situation: Situation, issues: List) -> str:
+        """Generate analysis without AI API."""
+        bed_occ = situation.bed_occupancy
+        status, outlook = FALLBACK_STATUSES[(bed_occ >= 75) + (bed_occ >= 90)]
+        
+        return FALLBACK_ANALYSIS.format(
+            status=status,
+            bed_occupancy=bed_occ,
+            available_beds=situation.available_beds,
+            icu_occupancy=situation.icu_occupancy,
+            available_icu=situation.available_icu,
+            staff_ratio=situation.staff_ratio,
+            direction=situation.trends.direction.title(),
+            bed_change_3d=situation.trends.bed_change_3d,
+            issue_count=len(issues),
+            issue_lines="\n".join(f"- {i['message']}" for i in issues[:3]) if issues
+            else "- No critical issues at this time",
+            outlook=outlook
+        )
+    
     def _add_thought(self, step: str, observation: str, reasoning: str, conclusion: str, confidence: float):
-        """Add a thought to the reasoning chain."""
+        """Add a thought to the reasoning chain, unless tracing is disabled."""
+        if not self.trace_enabled:
+            return
         self.reasoning_chain.append(AgentThought(
             step=step,
             observation=observation,
             reasoning=reasoning,
             conclusion=conclusion,
-            confidence=confidence
+            confidence=confidence,
+            timestamp=self._timestamp_iso()
         ))
     
+    def _timestamp(self) -> datetime:
+        """Timestamp of the running cycle, or the current time outside a cycle."""
+        return self._cycle_time or datetime.now()
+    
+    def _timestamp_iso(self) -> str:
+        """ISO 8601 form of _timestamp(), formatted once per cycle."""
+        return self._cycle_iso or datetime.now().isoformat()
+    
     def _thought_to_dict(self, thought: AgentThought) -> Dict:
         """Convert thought to dictionary for serialization."""
         return {
@@ -619,12 +822,14 @@ Keep response concise and actionable."""
             'reasoning': thought.reasoning,
             'conclusion': thought.conclusion,
             'confidence': thought.confidence,
-            'timestamp': thought.timestamp.isoformat()
+            'timestamp': thought.timestamp
         }
     
     def get_reasoning_trace(self) -> str:
         """Get human-readable reasoning trace."""
         trace = "## Agent Reasoning Trace\n\n"
+        if not self.reasoning_chain and not self.trace_enabled:
+            return trace + "Reasoning trace recording is disabled for this agent.\n"
         for i, thought in enumerate(self.reasoning_chain, 1):
             trace += f"**Step {i}: {thought.step}**\n"
             trace += f"- Observation: {thought.observation}\n"
@@ -636,47 +841,50 @@ Keep response concise and actionable."""
     def get_pending_actions_summary(self) -> List[Dict]:
         """Get summary of pending actions requiring approval."""
         return [{
+            'id': a.id,
             'action': a.description,
-            'type': a.action_type.value,
+            'type': a.action_type,
             'priority': a.priority,
             'details': a.details
-        } for a in self.pending_actions]
+        } for a in self.pending_actions.values()]
     
-    def approve_action(self, index: int) -> bool:
+    def approve_action(self, action_id: int) -> bool:
         """Approve and execute a pending action."""
-        if 0 <= index < len(self.pending_actions):
-            action = self.pending_actions.pop(index)
-            action.outcome = "Approved and executed"
-            self.actions_taken.append(action)
-            AGENT_LOG.append({
-                'timestamp': datetime.now().isoformat(),
-                'action': action.description,
-                'type': action.action_type.value,
-                'auto': False,
-                'approved': True
-            })
-            return True
-        return False
+        action = self.pending_actions.pop(action_id, None)
+        if action is None:
+            return False
+        self._result_key = None
+        action.outcome = "Approved and executed"
+        self.actions_taken.append(action)
+        AGENT_LOG.append({
+            'timestamp': datetime.now().isoformat(),
+            'action': action.description,
+            'type': action.action_type,
+            'auto': False,
+            'approved': True
+        })
+        return True
     
-    def reject_action(self, index: int) -> bool:
+    def reject_action(self, action_id: int) -> bool:
         """Reject a pending action."""
-        if 0 <= index < len(self.pending_actions):
-            action = self.pending_actions.pop(index)
-            action.outcome = "Rejected by operator"
-            AGENT_LOG.append({
-                'timestamp': datetime.now().isoformat(),
-                'action': action.description,
-                'type': action.action_type.value,
-                'auto': False,
-                'approved': False
-            })
-            return True
-        return False
+        action = self.pending_actions.pop(action_id, None)
+        if action is None:
+            return False
+        self._result_key = None
+        action.outcome = "Rejected by operator"
+        AGENT_LOG.append({
+            'timestamp': datetime.now().isoformat(),
+            'action': action.description,
+            'type': action.action_type,
+            'auto': False,
+            'approved': False
+        })
+        return True
 
 
 def get_agent_log() -> List[Dict]:
-    """Get the global agent action log."""
-    return AGENT_LOG
+    """Get a snapshot of the global agent action log, oldest entry first."""
+    return list(AGENT_LOG)
 
 
 def get_agent_memory() -> Dict:
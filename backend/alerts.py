@@ -3,93 +3,116 @@ Enhanced Alert Banner Module for HospitAI
 Displays warnings and alerts based on hospital capacity and risk metrics.
 """
 
+import operator
+
 import streamlit as st
 
+from dashboard_state import OCCUPANCY_CRITICAL, OCCUPANCY_HIGH
 
-def show_alerts(df):
-    """
-    Display alert banners based on current hospital metrics.
-    
-    Checks multiple risk factors and displays appropriate alerts.
-    """
-    latest = df.iloc[-1]
-    
-    # Calculate ratios
-    bed_ratio = latest['occupied_beds'] / latest['total_beds']
-    icu_ratio = latest['occupied_icu'] / latest['total_icu_beds']
-    vent_ratio = latest['ventilators_used'] / latest['total_ventilators']
-    
-    alerts_shown = False
-    
+
+# Alert rules as (metric, comparison, threshold, severity, message template).
+# Each metric raises at most one alert, so a metric's most severe rule is
+# listed first (e.g. critical bed occupancy pre-empts the high-occupancy band).
+ALERT_RULES = (
     # Critical alerts (red)
-    if bed_ratio > 0.90:
-        st.error(f"🚨 **CRITICAL: Hospital at {bed_ratio*100:.0f}% capacity!** Immediate action required.")
-        alerts_shown = True
-    
-    if icu_ratio > 0.90:
-        st.error(f"🚨 **CRITICAL: ICU at {icu_ratio*100:.0f}% capacity!** Consider patient transfers.")
-        alerts_shown = True
-    
+    ('bed_ratio', operator.gt, OCCUPANCY_CRITICAL, 'error',
+     "🚨 **CRITICAL: Hospital at {value:.0%} capacity!** Immediate action required."),
+    ('icu_ratio', operator.gt, OCCUPANCY_CRITICAL, 'error',
+     "🚨 **CRITICAL: ICU at {value:.0%} capacity!** Consider patient transfers."),
     # High alerts (orange/warning)
-    if 0.75 < bed_ratio <= 0.90:
-        st.warning(f"⚠️ **High bed occupancy: {bed_ratio*100:.0f}%** - Monitor closely")
-        alerts_shown = True
+    ('bed_ratio', operator.gt, OCCUPANCY_HIGH, 'warning',
+     "⚠️ **High bed occupancy: {value:.0%}** - Monitor closely"),
+    ('icu_ratio', operator.gt, OCCUPANCY_HIGH, 'warning',
+     "⚠️ **High ICU occupancy: {value:.0%}** - Prepare contingency"),
+    ('vent_ratio', operator.gt, 0.80, 'warning',
+     "💨 **Ventilator usage high: {value:.0%}**"),
+    ('flu_cases', operator.gt, 70, 'warning',
+     "🤒 **Flu surge: {value:.0f} cases** (above threshold)"),
+    ('pollution', operator.gt, 150, 'warning',
+     "🌫️ **Poor air quality: AQI {value:.0f}**"),
+    ('medication_stock', operator.lt, 300, 'warning',
+     "💊 **Low medication stock: {value:.0f} units**"),
+    # Staff alert
+    ('staff_ratio', operator.lt, 0.9, 'warning',
+     "👥 **Staff shortage: Ratio {value:.2f}** (below 1.0)"),
+    # Surge risk alert
+    ('risk_score', operator.ge, 3, 'error',
+     "⚠️ **HIGH SURGE RISK** - Score: {value:.0f}/6"),
+)
+
+# State fields checked by ALERT_RULES, in the order passed to _compute_alerts
+ALERT_METRICS = ('bed_ratio', 'icu_ratio', 'vent_ratio', 'staff_ratio',
+                 'flu_cases', 'pollution', 'medication_stock', 'risk_score')
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _compute_alerts(values):
+    """
+    Decide which alerts fire for the given metric values.
     
-    if 0.75 < icu_ratio <= 0.90:
-        st.warning(f"⚠️ **High ICU occupancy: {icu_ratio*100:.0f}%** - Prepare contingency")
-        alerts_shown = True
+    Kept free of Streamlit rendering so reruns with unchanged metrics hit the
+    cache and skip every rule.
     
-    if vent_ratio > 0.80:
-        st.warning(f"💨 **Ventilator usage high: {vent_ratio*100:.0f}%**")
-        alerts_shown = True
+    Args:
+        values (tuple): Floats ordered as ALERT_METRICS; risk_score may be None
     
-    if latest['flu_cases'] > 70:
-        st.warning(f"🤒 **Flu surge: {int(latest['flu_cases'])} cases** (above threshold)")
-        alerts_shown = True
+    Returns:
+        list[tuple[str, str]]: (severity, message) pairs, where severity is
+        the name of the Streamlit call used to render it
+    """
+    metrics = dict(zip(ALERT_METRICS, values))
     
-    if latest['pollution'] > 150:
-        st.warning(f"🌫️ **Poor air quality: AQI {latest['pollution']:.0f}**")
-        alerts_shown = True
+    # Keyed by metric so the first matching rule wins; dicts keep insertion order
+    alerts = {}
+    for metric, compare, threshold, severity, template in ALERT_RULES:
+        value = metrics[metric]
+        if metric not in alerts and value is not None and compare(value, threshold):
+            alerts[metric] = (severity, template.format(value=value))
     
-    if latest['medication_stock'] < 300:
-        st.warning(f"💊 **Low medication stock: {int(latest['medication_stock'])} units**")
-        alerts_shown = True
+    return list(alerts.values())
+
+
+def show_alerts(state):
+    """
+    Display alert banners based on current hospital metrics.
     
-    # Staff alert
-    staff_ratio = latest['staff_on_duty'] / latest['occupied_beds']
-    if staff_ratio < 0.9:
-        st.warning(f"👥 **Staff shortage: Ratio {staff_ratio:.2f}** (below 1.0)")
-        alerts_shown = True
+    Checks multiple risk factors and displays appropriate alerts.
     
-    # Surge risk alert
-    if 'risk_score' in df.columns and latest['risk_score'] >= 3:
-        st.error(f"⚠️ **HIGH SURGE RISK** - Score: {int(latest['risk_score'])}/6")
-        alerts_shown = True
+    Args:
+        state (DashboardState): Latest metrics from dashboard_state.extract_state
+    """
+    # Pass plain floats so the cache key is cheap to hash
+    values = tuple(getattr(state, metric) for metric in ALERT_METRICS)
+    alerts = _compute_alerts(tuple(None if v is None else float(v) for v in values))
+    
+    for severity, message in alerts:
+        getattr(st, severity)(message)
     
     # All clear
-    if not alerts_shown:
+    if not alerts:
         st.success("✅ **All systems normal** - No immediate concerns")
 
 
-def show_capacity_gauge(df):
-    """Display visual gauge of hospital capacity."""
-    latest = df.iloc[-1]
+def show_capacity_gauge(state):
+    """
+    Display visual gauge of hospital capacity.
     
+    Args:
+        state (DashboardState): Latest metrics from dashboard_state.extract_state
+    """
     st.subheader("🏥 Capacity Overview")
     
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        bed_ratio = latest['occupied_beds'] / latest['total_beds']
-        st.progress(min(bed_ratio, 1.0))
+        st.progress(min(state.bed_ratio, 1.0))
     
     with col2:
-        st.metric("Capacity", f"{bed_ratio*100:.1f}%")
+        st.metric("Capacity", f"{state.bed_ratio:.1%}")
     
-    st.caption(f"Beds: {int(latest['occupied_beds'])}/{int(latest['total_beds'])} | "
-               f"ICU: {int(latest['occupied_icu'])}/{int(latest['total_icu_beds'])} | "
-               f"Ventilators: {int(latest['ventilators_used'])}/{int(latest['total_ventilators'])}")
-
+    st.caption(f"Beds: {state.occupied_beds:.0f}/{state.total_beds:.0f} | "
+               f"ICU: {state.occupied_icu:.0f}/{state.total_icu_beds:.0f} | "
+               f"Ventilators: {state.ventilators_used:.0f}/{state.total_ventilators:.0f}")
 
 if __name__ == "__main__":
     print("alerts.py loaded - run through Streamlit to see alerts")
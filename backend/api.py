@@ -5,58 +5,63 @@ REST API for the React frontend to connect with the Python backend.
 
 from fastapi import FastAPI, HTTPException, Query, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-import json
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from collections import OrderedDict
+from itertools import chain
+from typing import List, Dict, Any, Mapping, Optional
+from datetime import datetime, timedelta, timezone
 import numpy as np
+import orjson
 import pandas as pd
+import asyncio
+import csv
 import io
+import os
+import time
 
 # Import existing modules
 from data_generator import generate_data, generate_multi_hospital_data
 from predictor_rulebased import predict_surge, get_risk_breakdown
 from predictor_ml import predict_ml
-from ai_agent import HospitAIAgent, get_agent_log, get_agent_memory, AlertLevel, ActionType
-from real_data_api import get_realtime_data, check_api_status
-
-
-# Custom JSON encoder for numpy types
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if isinstance(obj, np.bool_):
-            return bool(obj)
-        return super().default(obj)
-
-
-def convert_numpy(obj):
-    """Recursively convert numpy types to Python native types."""
-    if isinstance(obj, dict):
-        return {k: convert_numpy(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy(item) for item in obj]
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, np.bool_):
-        return bool(obj)
-    return obj
+from ai_agent import (
+    HospitAIAgent, get_agent_log, get_agent_memory, preload_gemini, to_hospital_data,
+    AlertLevel, ActionType
+)
+from dashboard_state import compute_ratios
+from real_data_api import get_realtime_data, check_api_status, OPENWEATHER_API_KEY, DEFAULT_CITY
+
+
+# JSON response rendered with orjson, which also serializes numpy types natively
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading the Gemini SDK and refreshing live data in the background."""
+    preload_gemini()
+    refresher = asyncio.create_task(refresh_live_data()) if OPENWEATHER_API_KEY else None
+    yield
+    if refresher is not None:
+        refresher.cancel()
 
 
 app = FastAPI(
     title="HospitAI API",
     description="AI-powered hospital surge prediction system",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware for React frontend
@@ -76,14 +81,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@dataclass(frozen=True)
+class UploadState:
+    """
+    Immutable snapshot of uploaded data by hospital_id.
+    
+    Never mutated in place: uploads and deletes swap in a new snapshot with a
+    bumped revision, so a request that reads the global once sees one
+    consistent view and the revision invalidates cached predictions.
+    """
+    uploaded: Mapping[str, pd.DataFrame] = field(default_factory=dict)
+    rev: int = 0
+
+
 # Global state
 agent_instance: Optional[HospitAIAgent] = None
+agent_lock = asyncio.Lock()  # Serializes agent cycles running in worker threads
 current_data = None
-uploaded_data: Dict[str, pd.DataFrame] = {}  # Store uploaded data by hospital_id
-
-
-# Pydantic models for request/response
-class HospitalMetrics(BaseModel):
+upload_state = UploadState()
+
+# Predicted data, and responses derived from it, cached per (hospital_id, days,
+# upload revision). Generated data is seeded and uploads bump the revision, so
+# an entry never goes stale; the cache is only bounded, least recently used first.
+DATA_CACHE_SIZE = 32
+_data_cache: OrderedDict = OrderedDict()
+
+# Live weather and air quality per city as (expiry, data), refreshed in the
+# background so requests never wait on OpenWeatherMap
+LIVE_DATA_REFRESH_SECONDS = 300
+LIVE_DATA_TTL_SECONDS = 2 * LIVE_DATA_REFRESH_SECONDS
+_live_data_cache: Dict[str, tuple] = {}
+_live_data_requested: Dict[str, float] = {}  # city -> last successful request time
+
+
+# Response models built on every dashboard request are plain dataclasses,
+# which orjson serializes natively without a validation pass
+@dataclass(slots=True)
+class HospitalMetrics:
     total_beds: int
     occupied_beds: int
     bed_occupancy: float
@@ -97,121 +131,199 @@ class HospitalMetrics(BaseModel):
     staff_ratio: float
 
 
-class RiskFactor(BaseModel):
+@dataclass(slots=True)
+class RiskFactor:
     name: str
     value: float
     threshold: float
     triggered: bool
 
 
-class RiskAssessment(BaseModel):
-    score: int
-    max_score: int
-    level: str
-    factors: List[RiskFactor]
-
-
-class EnvironmentData(BaseModel):
+@dataclass(slots=True)
+class EnvironmentData:
     temperature: float
     humidity: float
     aqi: int
     flu_cases: int
 
 
-class TrendData(BaseModel):
-    bed_change_1d: int
-    bed_change_3d: int
-    bed_change_7d: int
-    icu_change_1d: int
-    direction: str
-    velocity: str
-
-
-class DashboardResponse(BaseModel):
-    hospital: Dict[str, str]
-    metrics: HospitalMetrics
-    risk: RiskAssessment
-    environment: EnvironmentData
-    trends: TrendData
-    timestamp: str
-
-
-class AgentIssue(BaseModel):
-    type: str
-    resource: str
-    severity: str
-    value: float
-    message: str
-
-
-class AgentAction(BaseModel):
-    id: int
-    action_type: str
-    description: str
-    priority: int
-    auto_executed: bool
-    requires_approval: bool
-    details: Dict[str, Any]
-    status: str
-
-
-class AgentResponse(BaseModel):
-    situation: Dict[str, Any]
-    issues: List[AgentIssue]
-    actions_executed: List[AgentAction]
-    actions_pending: List[AgentAction]
-    reasoning_trace: str
+# Dashboard risk factors: display name, displayed threshold, and the limit
+# applied to the raw value (counts, or ratios for the occupancy factors).
+# Staff ratio is the only factor that triggers below its limit.
+RISK_FACTOR_NAMES = ("Flu Cases", "Air Quality", "Staff Ratio",
+                     "Bed Occupancy", "ICU Occupancy", "Ventilator Usage")
+RISK_FACTOR_THRESHOLDS = (50, 100, 1.0, 80, 75, 70)
+RISK_FACTOR_LIMITS = np.array([50, 100, 1.0, 0.8, 0.75, 0.7])
+RISK_FACTOR_BELOW = np.array([False, False, True, False, False, False])
+
+# Uploaded count columns, each stored in the narrowest of UPLOAD_COUNT_DTYPES
+# that holds its values; int16 is the floor so arithmetic on typical hospital
+# counts cannot overflow
+UPLOAD_COUNT_COLUMNS = ('occupied_beds', 'total_beds', 'occupied_icu', 'total_icu_beds',
+                        'ventilators_used', 'total_ventilators', 'staff_on_duty', 'flu_cases',
+                        'humidity', 'pollution', 'total_staff', 'oxygen_consumed',
+                        'medication_stock', 'emergency_admissions')
+UPLOAD_COUNT_DTYPES = (np.int16, np.int32, np.int64)
+
+# Upload schema: required columns with the alternative names accepted for each
+UPLOAD_REQUIRED_COLUMNS = ('date', 'occupied_beds', 'total_beds')
+UPLOAD_COLUMN_ALTERNATIVES = {
+    'date': ('datetime', 'time', 'day', 'record_date'),
+    'occupied_beds': ('beds_occupied', 'current_beds', 'beds_used', 'occupied'),
+    'total_beds': ('bed_capacity', 'capacity', 'max_beds', 'beds_total')
+}
+
+# Optional columns as (column, accepted source names, fill default, dtype,
+# generator used when no source is present); generators may use earlier columns
+UPLOAD_OPTIONAL_COLUMNS = (
+    ('occupied_icu', ('occupied_icu',), 15, np.int64,
+     lambda processed, rng, n: (processed['occupied_beds'] * 0.15).astype(int)),
+    ('total_icu_beds', ('total_icu_beds',), 30, np.int64, lambda processed, rng, n: 30),
+    ('ventilators_used', ('ventilators_used',), 10, np.int64,
+     lambda processed, rng, n: (processed['occupied_icu'] * 0.5).astype(int)),
+    ('total_ventilators', ('total_ventilators',), 20, np.int64, lambda processed, rng, n: 20),
+    ('staff_on_duty', ('staff_on_duty',), 120, np.int64, lambda processed, rng, n: rng.integers(100, 140, n)),
+    ('flu_cases', ('flu_cases',), 30, np.int64, lambda processed, rng, n: rng.poisson(30, n)),
+    ('temperature', ('temperature',), 25, np.float64, lambda processed, rng, n: rng.normal(25, 5, n).round(1)),
+    ('humidity', ('humidity',), 60, np.int64, lambda processed, rng, n: rng.normal(60, 10, n).astype(int)),
+    ('pollution', ('pollution', 'aqi', 'air_quality', 'pollution_aqi'), 75, np.int64,
+     lambda processed, rng, n: rng.gamma(2, 30, n).astype(int))
+)
 
+# Every normalized column name the upload schema reads; other columns are skipped at parse time
+UPLOAD_KNOWN_COLUMNS = frozenset(chain(
+    UPLOAD_REQUIRED_COLUMNS,
+    chain.from_iterable(UPLOAD_COLUMN_ALTERNATIVES.values()),
+    chain.from_iterable(sources for _, sources, _, _, _ in UPLOAD_OPTIONAL_COLUMNS)
+))
 
-class PredictionPoint(BaseModel):
-    date: str
-    actual: Optional[int]
-    predicted: Optional[int]
-    upper_bound: Optional[int]
-    lower_bound: Optional[int]
-    risk_level: Optional[str]
+# File types accepted by the upload endpoint
+ALLOWED_EXTENSIONS = frozenset({'csv', 'xlsx', 'xls'})
+MAX_UPLOAD_SIZE_MB = 10
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 
 # Helper functions
 def get_or_generate_data(hospital_id: str = "H001", days: int = 30):
     """Get uploaded data if available, otherwise generate simulated data."""
-    global current_data, uploaded_data
+    global current_data
+    current_data = _cached_entry(hospital_id, days)[0]
+    return current_data
+
+
+def get_dashboard_response(hospital_id: str = "H001", days: int = 30) -> Dict:
+    """Dashboard response for a hospital, built once per cached prediction."""
+    df, payloads = _cached_entry(hospital_id, days)
+    response = payloads.get('dashboard')
+    if response is None:
+        response = payloads['dashboard'] = df_to_dashboard_response(df, hospital_id)
+    return {**response, "timestamp": datetime.now(timezone.utc).isoformat()}
+
+
+def _cached_entry(hospital_id: str, days: int) -> tuple:
+    """Return the (prediction, derived payloads) cache entry, predicting on a miss."""
+    # Serve the cached prediction until an upload changes the revision
+    state = upload_state
+    key = (hospital_id, days, state.rev)
+    cached = _data_cache.get(key)
+    if cached is not None:
+        _data_cache.move_to_end(key)
+        return cached
+    
+    entry = _data_cache[key] = (_load_and_predict(state.uploaded, hospital_id, days), {})
     
-    # Check if we have uploaded data for this hospital
+    # Entries for older upload revisions are never hit again and age out first
+    if len(_data_cache) > DATA_CACHE_SIZE:
+        _data_cache.popitem(last=False)
+    return entry
+
+
+async def fetch_live_data(city: str) -> dict:
+    """Fetch live data for a city in a worker thread and store it in the cache."""
+    data = await run_in_threadpool(get_realtime_data, city)
+    _live_data_cache[city] = (time.monotonic() + LIVE_DATA_TTL_SECONDS, data)
+    return data
+
+
+async def refresh_live_data():
+    """Refresh the default city and every city requested within the TTL, forever."""
+    while True:
+        # Stop refreshing, and drop, cities nobody has asked for within the TTL
+        cutoff = time.monotonic() - LIVE_DATA_TTL_SECONDS
+        for city in [c for c, last in _live_data_requested.items() if last < cutoff]:
+            del _live_data_requested[city]
+            if city != DEFAULT_CITY:
+                _live_data_cache.pop(city, None)
+        
+        for city in {DEFAULT_CITY, *_live_data_requested}:
+            try:
+                await fetch_live_data(city)
+            except Exception as e:
+                print(f"Live data refresh error for {city}: {e}")
+        await asyncio.sleep(LIVE_DATA_REFRESH_SECONDS)
+
+
+def _load_and_predict(uploaded_data: Mapping[str, pd.DataFrame], hospital_id: str, days: int):
+    """Load uploaded or generated data for a hospital and run surge prediction."""
+    # Check if we have uploaded data for this hospital; predict_surge copies
+    # its input, so the stored frame is never mutated and needs no copy here
     if hospital_id in uploaded_data:
-        df = uploaded_data[hospital_id].copy()
+        df = uploaded_data[hospital_id]
         # Limit to requested days if needed
         if len(df) > days:
             df = df.tail(days)
-        df = predict_surge(df)
-        current_data = df
-        return df
+        return predict_surge(df)
     
     # Also check for generic "UPLOADED" data
     if "UPLOADED" in uploaded_data and hospital_id == "UPLOADED":
-        df = uploaded_data["UPLOADED"].copy()
+        df = uploaded_data["UPLOADED"]
         if len(df) > days:
             df = df.tail(days)
-        df = predict_surge(df)
-        current_data = df
-        return df
+        return predict_surge(df)
     
     # Fall back to generated data
     df = generate_data(num_days=days, hospital_id=hospital_id)
-    df = predict_surge(df)
-    current_data = df
-    return df
+    return predict_surge(df)
+
+
+def format_chart_dates(df) -> List[str]:
+    """Format each row's date (the 'date' column, else the index) as e.g. 'Jan 05'."""
+    return format_dates(pd.Index(df['date']) if 'date' in df.columns else df.index)
+
+
+def format_dates(dates: pd.Index) -> List[str]:
+    """Format each date as e.g. 'Jan 05', in one vectorized call for a DatetimeIndex."""
+    if isinstance(dates, pd.DatetimeIndex):
+        return dates.strftime('%b %d').tolist()
+    return [d.strftime('%b %d') if hasattr(d, 'strftime') else str(d)[:10] for d in dates]
+
+
+# Columns read from the latest row by df_to_dashboard_response
+DASHBOARD_COLUMNS = ('hospital_name', 'occupied_beds', 'total_beds', 'occupied_icu', 'total_icu_beds',
+                     'ventilators_used', 'total_ventilators', 'staff_on_duty',
+                     'flu_cases', 'pollution', 'temperature', 'humidity')
 
 
 def df_to_dashboard_response(df, hospital_id: str = "H001") -> Dict:
     """Convert DataFrame to dashboard response format."""
-    latest = df.iloc[-1]
+    # Read the latest value of each column the response uses, without building a row Series
+    columns = df.columns
+    latest = {col: df[col].iat[-1] for col in DASHBOARD_COLUMNS if col in columns}
     
-    # Calculate trends
-    bed_change_1d = int(df['occupied_beds'].iloc[-1] - df['occupied_beds'].iloc[-2]) if len(df) >= 2 else 0
-    bed_change_3d = int(df['occupied_beds'].iloc[-1] - df['occupied_beds'].iloc[-3]) if len(df) >= 3 else 0
-    bed_change_7d = int(df['occupied_beds'].iloc[-1] - df['occupied_beds'].iloc[-7]) if len(df) >= 7 else 0
-    icu_change_1d = int(df['occupied_icu'].iloc[-1] - df['occupied_icu'].iloc[-2]) if len(df) >= 2 else 0
+    # Calculate trends from the raw column arrays
+    beds = df['occupied_beds'].to_numpy()
+    icu = df['occupied_icu'].to_numpy()
+    bed_change_1d = int(beds[-1] - beds[-2]) if len(df) >= 2 else 0
+    bed_change_3d = int(beds[-1] - beds[-3]) if len(df) >= 3 else 0
+    bed_change_7d = int(beds[-1] - beds[-7]) if len(df) >= 7 else 0
+    icu_change_1d = int(icu[-1] - icu[-2]) if len(df) >= 2 else 0
+    
+    # Bed, ICU and ventilator occupancy plus staff ratio from the shared divide,
+    # so zero capacities read the same here as on the dashboard and in the agent
+    ratios = compute_ratios(latest, min_patients=1)[2]
+    bed_ratio, icu_ratio, vent_ratio, staff_ratio = ratios
+    bed_occupancy, icu_occupancy, ventilator_usage = (ratios[:3] * 100).round(1)
+    staff_ratio_rounded = staff_ratio.round(2)
     
     # Determine trend direction
     if bed_change_3d > 10:
@@ -227,17 +339,21 @@ def df_to_dashboard_response(df, hospital_id: str = "H001") -> Dict:
     # Get risk breakdown
     breakdown = get_risk_breakdown(df)
     
+    # Evaluate all risk factors in one vectorized comparison
+    flu_cases = latest.get('flu_cases', 0)
+    pollution = latest.get('pollution', 0)
+    raw_values = np.array([flu_cases, pollution, staff_ratio, bed_ratio, icu_ratio, vent_ratio], dtype=np.float64)
+    triggered = np.where(RISK_FACTOR_BELOW, raw_values < RISK_FACTOR_LIMITS, raw_values > RISK_FACTOR_LIMITS)
+    values = (round(flu_cases, 1), round(pollution, 1), staff_ratio_rounded,
+              bed_occupancy, icu_occupancy, ventilator_usage)
+    
     # Build risk factors
     risk_factors = [
-        {"name": "Flu Cases", "value": float(round(latest.get('flu_cases', 0), 1)), "threshold": 50, "triggered": bool(latest.get('flu_cases', 0) > 50)},
-        {"name": "Air Quality", "value": float(round(latest.get('pollution', 0), 1)), "threshold": 100, "triggered": bool(latest.get('pollution', 0) > 100)},
-        {"name": "Staff Ratio", "value": float(round(latest['staff_on_duty'] / max(latest['occupied_beds'], 1), 2)), "threshold": 1.0, "triggered": bool((latest['staff_on_duty'] / max(latest['occupied_beds'], 1)) < 1.0)},
-        {"name": "Bed Occupancy", "value": float(round((latest['occupied_beds'] / latest['total_beds']) * 100, 1)), "threshold": 80, "triggered": bool((latest['occupied_beds'] / latest['total_beds']) > 0.8)},
-        {"name": "ICU Occupancy", "value": float(round((latest['occupied_icu'] / latest['total_icu_beds']) * 100, 1)), "threshold": 75, "triggered": bool((latest['occupied_icu'] / latest['total_icu_beds']) > 0.75)},
-        {"name": "Ventilator Usage", "value": float(round((latest['ventilators_used'] / latest['total_ventilators']) * 100, 1)), "threshold": 70, "triggered": bool((latest['ventilators_used'] / latest['total_ventilators']) > 0.7)}
+        RiskFactor(name=name, value=float(value), threshold=threshold, triggered=bool(hit))
+        for name, value, threshold, hit in zip(RISK_FACTOR_NAMES, values, RISK_FACTOR_THRESHOLDS, triggered)
     ]
     
-    triggered_count = sum(1 for f in risk_factors if f['triggered'])
+    triggered_count = int(triggered.sum())
     
     result = {
         "hospital": {
@@ -245,31 +361,31 @@ def df_to_dashboard_response(df, hospital_id: str = "H001") -> Dict:
             "name": str(latest.get('hospital_name', 'City General Hospital')),
             "location": "Delhi"
         },
-        "metrics": {
-            "total_beds": int(latest['total_beds']),
-            "occupied_beds": int(latest['occupied_beds']),
-            "bed_occupancy": float(round((latest['occupied_beds'] / latest['total_beds']) * 100, 1)),
-            "total_icu": int(latest['total_icu_beds']),
-            "occupied_icu": int(latest['occupied_icu']),
-            "icu_occupancy": float(round((latest['occupied_icu'] / latest['total_icu_beds']) * 100, 1)),
-            "total_ventilators": int(latest['total_ventilators']),
-            "ventilators_used": int(latest['ventilators_used']),
-            "ventilator_usage": float(round((latest['ventilators_used'] / latest['total_ventilators']) * 100, 1)),
-            "staff_on_duty": int(latest['staff_on_duty']),
-            "staff_ratio": float(round(latest['staff_on_duty'] / max(latest['occupied_beds'], 1), 2))
-        },
+        "metrics": HospitalMetrics(
+            total_beds=int(latest['total_beds']),
+            occupied_beds=int(latest['occupied_beds']),
+            bed_occupancy=float(bed_occupancy),
+            total_icu=int(latest['total_icu_beds']),
+            occupied_icu=int(latest['occupied_icu']),
+            icu_occupancy=float(icu_occupancy),
+            total_ventilators=int(latest['total_ventilators']),
+            ventilators_used=int(latest['ventilators_used']),
+            ventilator_usage=float(ventilator_usage),
+            staff_on_duty=int(latest['staff_on_duty']),
+            staff_ratio=float(staff_ratio_rounded)
+        ),
         "risk": {
             "score": int(triggered_count),
             "max_score": 6,
             "level": str(breakdown['risk_level']),
             "factors": risk_factors
         },
-        "environment": {
-            "temperature": float(round(latest.get('temperature', 20), 1)),
-            "humidity": int(latest.get('humidity', 65)),
-            "aqi": int(latest.get('pollution', 50)),
-            "flu_cases": int(latest.get('flu_cases', 0))
-        },
+        "environment": EnvironmentData(
+            temperature=float(round(latest.get('temperature', 20), 1)),
+            humidity=int(latest.get('humidity', 65)),
+            aqi=int(latest.get('pollution', 50)),
+            flu_cases=int(latest.get('flu_cases', 0))
+        ),
         "trends": {
             "bed_change_1d": int(bed_change_1d),
             "bed_change_3d": int(bed_change_3d),
@@ -278,11 +394,10 @@ def df_to_dashboard_response(df, hospital_id: str = "H001") -> Dict:
             "direction": direction,
             "velocity": velocity
         },
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
     
-    # Convert all numpy types to native Python types
-    return convert_numpy(result)
+    return result
 
 
 # API Endpoints
@@ -300,8 +415,7 @@ async def get_dashboard_summary(
 ):
     """Get complete dashboard summary."""
     try:
-        df = get_or_generate_data(hospital_id, days)
-        return df_to_dashboard_response(df, hospital_id)
+        return ORJSONResponse(get_dashboard_response(hospital_id, days))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -310,9 +424,7 @@ async def get_dashboard_summary(
 async def get_metrics(hospital_id: str = "H001"):
     """Get current hospital metrics."""
     try:
-        df = get_or_generate_data(hospital_id)
-        response = df_to_dashboard_response(df, hospital_id)
-        return response["metrics"]
+        return ORJSONResponse(get_dashboard_response(hospital_id)["metrics"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -323,24 +435,23 @@ async def get_trends(hospital_id: str = "H001", days: int = 30):
     try:
         df = get_or_generate_data(hospital_id, days)
         
-        trends = []
-        for i, (idx, row) in enumerate(df.iterrows()):
-            # Handle date formatting
-            date_val = row.get('date', idx)
-            if hasattr(date_val, 'strftime'):
-                date_str = date_val.strftime('%b %d')
-            else:
-                date_str = str(date_val)[:10]
-            
-            trends.append({
-                "date": date_str,
-                "beds": int(row['occupied_beds']),
-                "icu": int(row['occupied_icu']),
-                "admissions": int(row.get('admissions', 8 + (i % 5))),
-                "discharges": int(row.get('discharges', 6 + (i % 4)))
-            })
+        # Pull whole columns once instead of indexing row by row
+        row_numbers = np.arange(len(df))
+        admissions = df['admissions'].to_numpy(dtype=np.int64) if 'admissions' in df.columns else 8 + row_numbers % 5
+        discharges = df['discharges'].to_numpy(dtype=np.int64) if 'discharges' in df.columns else 6 + row_numbers % 4
         
-        return {"data": convert_numpy(trends), "days": days}
+        trends = [
+            {"date": date_str, "beds": beds, "icu": icu, "admissions": adm, "discharges": dis}
+            for date_str, beds, icu, adm, dis in zip(
+                format_chart_dates(df),
+                df['occupied_beds'].to_numpy(dtype=np.int64).tolist(),
+                df['occupied_icu'].to_numpy(dtype=np.int64).tolist(),
+                admissions.tolist(),
+                discharges.tolist()
+            )
+        ]
+        
+        return ORJSONResponse({"data": trends, "days": days})
     except Exception as e:
         import traceback
         print(f"Trends error: {traceback.format_exc()}")
@@ -355,66 +466,70 @@ async def get_predictions(
     """Get ML predictions for future capacity."""
     try:
         df = get_or_generate_data(hospital_id, 30)
-        predictions = predict_ml(df, days=days)
-        
-        # Build response with historical + predicted
-        result = []
+        predictions = await run_in_threadpool(predict_ml, df, days=days)
         
-        # Historical data (last 30 days)
-        for idx, row in df.iterrows():
-            # Handle date formatting
-            date_val = row.get('date', idx)
-            if hasattr(date_val, 'strftime'):
-                date_str = date_val.strftime('%b %d')
-            else:
-                date_str = str(date_val)[:10]
-                
-            result.append({
+        # Build response with historical + predicted, starting with the last 30 days
+        result = [
+            {
                 "date": date_str,
-                "actual": int(row['occupied_beds']),
+                "actual": actual,
                 "predicted": None,
                 "upper_bound": None,
                 "lower_bound": None,
                 "risk_level": None
-            })
+            }
+            for date_str, actual in zip(
+                format_chart_dates(df),
+                df['occupied_beds'].to_numpy(dtype=np.int64).tolist()
+            )
+        ]
         
         # Predicted data
         if predictions is not None:
             total_beds = int(df['total_beds'].iloc[0])
-            for i, (date, value) in enumerate(predictions.items()):
-                pred_value = int(value)
-                occupancy = (pred_value / total_beds) * 100
-                
-                if occupancy >= 90:
-                    risk = "Critical"
-                elif occupancy >= 80:
-                    risk = "High"
-                elif occupancy >= 70:
-                    risk = "Medium"
-                else:
-                    risk = "Low"
-                
-                result.append({
-                    "date": date.strftime('%b %d') if hasattr(date, 'strftime') else str(date)[:10],
+            pred_dates = format_dates(predictions.index)
+            
+            # Confidence band widens with each forecast day
+            pred_values = predictions.to_numpy(dtype=np.int64)
+            offsets = np.arange(len(pred_values))
+            upper_bounds = (pred_values + 10 + offsets * 2).tolist()
+            lower_bounds = np.maximum(0, pred_values - 8 - offsets).tolist()
+            
+            # Forecast risk level from predicted bed occupancy, for all days at once
+            occupancy = pred_values / total_beds * 100
+            risk_levels = np.select(
+                [occupancy >= 90, occupancy >= 80, occupancy >= 70],
+                ["Critical", "High", "Medium"],
+                "Low"
+            ).tolist()
+            
+            result.extend(
+                {
+                    "date": date_str,
                     "actual": None,
                     "predicted": pred_value,
-                    "upper_bound": pred_value + 10 + i * 2,
-                    "lower_bound": max(0, pred_value - 8 - i),
+                    "upper_bound": upper,
+                    "lower_bound": lower,
                     "risk_level": risk
-                })
+                }
+                for date_str, pred_value, upper, lower, risk in zip(
+                    pred_dates, pred_values.tolist(), upper_bounds, lower_bounds, risk_levels
+                )
+            )
         
         # Calculate insights
         if predictions is not None and len(predictions) > 0:
-            peak_value = int(predictions.max())
-            peak_date = predictions.idxmax()
+            # Peak and first threshold crossing, both from one array of forecast values
+            values = predictions.to_numpy()
+            peak_index = int(values.argmax())
+            peak_value = int(values[peak_index])
+            peak_date = predictions.index[peak_index]
             total_beds = int(df['total_beds'].iloc[0])
             threshold = int(total_beds * 0.9)
             
-            days_until_threshold = None
-            for i, val in enumerate(predictions):
-                if val >= threshold:
-                    days_until_threshold = i + 1
-                    break
+            # First forecast day at or above the threshold, if any
+            over_threshold = values >= threshold
+            days_until_threshold = int(over_threshold.argmax()) + 1 if over_threshold.any() else None
             
             insights = {
                 "peak_occupancy": peak_value,
@@ -426,7 +541,7 @@ async def get_predictions(
         else:
             insights = None
         
-        return convert_numpy({
+        return ORJSONResponse({
             "data": result,
             "insights": insights,
             "forecast_days": days
@@ -461,44 +576,49 @@ async def run_agent(
         # Get or generate data
         df = get_or_generate_data(hospital_id)
         
-        # Initialize or update agent
         hospital_name = str(df['hospital_name'].iloc[0]) if 'hospital_name' in df.columns else "City General Hospital"
-        if agent_instance is None:
-            agent_instance = HospitAIAgent(
-                hospital_name=hospital_name,
-                autonomous_mode=autonomous_mode
-            )
-        else:
-            agent_instance.autonomous_mode = autonomous_mode
         
-        # Run agent cycle
-        results = agent_instance.run_cycle(df)
+        # Cycles share one agent, so they run one at a time
+        async with agent_lock:
+            # Initialize or update agent
+            if agent_instance is None:
+                agent_instance = HospitAIAgent(
+                    hospital_name=hospital_name,
+                    autonomous_mode=autonomous_mode
+                )
+            else:
+                agent_instance.autonomous_mode = autonomous_mode
+            
+            # Run agent cycle on the column arrays in a worker thread so other
+            # requests keep being served
+            results = await run_in_threadpool(agent_instance.run_cycle, to_hospital_data(df))
+            reasoning_trace = str(agent_instance.get_reasoning_trace())
         
-        # Format response - convert all values to native Python types
+        # Format response; numpy values are left to the orjson serializer
         actions_executed = []
         actions_pending = []
         
-        for i, action in enumerate(results['actions'].get('executed', [])):
+        for action in results['actions'].get('executed', []):
             actions_executed.append({
-                "id": int(i),
-                "action_type": str(action.action_type.value),
+                "id": action.id,
+                "action_type": action.action_type,
                 "description": str(action.description),
                 "priority": int(action.priority),
                 "auto_executed": bool(action.auto_executed),
                 "requires_approval": bool(action.requires_approval),
-                "details": convert_numpy(action.details),
+                "details": action.details,
                 "status": "executed"
             })
         
-        for i, action in enumerate(results['actions'].get('pending', [])):
+        for action in results['actions'].get('pending', []):
             actions_pending.append({
-                "id": int(i),
-                "action_type": str(action.action_type.value),
+                "id": action.id,
+                "action_type": action.action_type,
                 "description": str(action.description),
                 "priority": int(action.priority),
                 "auto_executed": bool(action.auto_executed),
                 "requires_approval": bool(action.requires_approval),
-                "details": convert_numpy(action.details),
+                "details": action.details,
                 "status": "pending"
             })
         
@@ -507,24 +627,21 @@ async def run_agent(
             issues.append({
                 "type": str(issue['type']),
                 "resource": str(issue['resource']),
-                "severity": str(issue['severity'].value) if hasattr(issue['severity'], 'value') else str(issue['severity']),
+                "severity": issue['severity'],
                 "value": float(issue['value']),
                 "message": str(issue['message'])
             })
         
-        # Convert situation to native types
-        situation = convert_numpy(results['situation'])
-        
         response = {
-            "situation": situation,
+            "situation": results['situation'],
             "issues": issues,
             "actions_executed": actions_executed,
             "actions_pending": actions_pending,
-            "reasoning_trace": str(agent_instance.get_reasoning_trace()),
-            "timestamp": datetime.now().isoformat()
+            "reasoning_trace": reasoning_trace,
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
         
-        return convert_numpy(response)
+        return ORJSONResponse(response)
     except Exception as e:
         import traceback
         print(f"Agent run error: {traceback.format_exc()}")
@@ -539,7 +656,9 @@ async def approve_action(action_id: int):
     if agent_instance is None:
         raise HTTPException(status_code=400, detail="Agent not initialized")
     
-    success = agent_instance.approve_action(action_id)
+    # Approvals change the pending queue, so they wait for a running cycle
+    async with agent_lock:
+        success = agent_instance.approve_action(action_id)
     if success:
         return {"status": "approved", "action_id": action_id}
     else:
@@ -554,7 +673,8 @@ async def reject_action(action_id: int):
     if agent_instance is None:
         raise HTTPException(status_code=400, detail="Agent not initialized")
     
-    success = agent_instance.reject_action(action_id)
+    async with agent_lock:
+        success = agent_instance.reject_action(action_id)
     if success:
         return {"status": "rejected", "action_id": action_id}
     else:
@@ -569,11 +689,16 @@ async def get_ai_analysis(hospital_id: str = "H001"):
     try:
         df = get_or_generate_data(hospital_id)
         
-        if agent_instance is None:
-            agent_instance = HospitAIAgent()
+        # Snapshot the situation under the lock so cycles cannot replace it
+        # mid-read, then await Gemini without holding up other agent calls
+        async with agent_lock:
+            if agent_instance is None:
+                agent_instance = HospitAIAgent()
+            agent = agent_instance
+            situation, issues = agent.get_analysis_inputs(to_hospital_data(df))
         
-        analysis = agent_instance.get_ai_analysis(df)
-        return {"analysis": analysis, "timestamp": datetime.now().isoformat()}
+        analysis = await agent.analyze_async(situation, issues)
+        return {"analysis": analysis, "timestamp": datetime.now(timezone.utc).isoformat()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -588,13 +713,19 @@ async def get_action_log():
 async def get_live_data(city: str = "Delhi"):
     """Get live environmental data from OpenWeatherMap APIs."""
     try:
-        data = get_realtime_data(city)
+        # Serve the background-refreshed copy; only a new or stale city is fetched inline
+        cached = _live_data_cache.get(city)
+        if cached is not None and time.monotonic() < cached[0]:
+            data = cached[1]
+        else:
+            data = await fetch_live_data(city)
+        _live_data_requested[city] = time.monotonic()
         return {
             "city": city,
             "weather": data['weather'],
             "air_quality": data['air_quality'],
             "combined": data['combined'],
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except ValueError as e:
         # API key not configured
@@ -606,32 +737,33 @@ async def get_live_data(city: str = "Delhi"):
 @app.get("/api/live-data/status")
 async def get_api_status():
     """Check status of external APIs."""
-    status = check_api_status()
+    status = await run_in_threadpool(check_api_status)
     return status
 
 
 @app.get("/api/hospitals")
 async def get_hospitals():
     """Get list of available hospitals."""
-    global uploaded_data
-    
     hospitals = [
         {"id": "H001", "name": "City General Hospital", "location": "Delhi"},
         {"id": "H002", "name": "St. Mary Medical Center", "location": "Mumbai"},
         {"id": "H003", "name": "Regional Health Center", "location": "Bangalore"}
     ]
     
-    # Add uploaded data hospitals
-    for hospital_id in uploaded_data.keys():
-        if hospital_id not in [h["id"] for h in hospitals]:
-            hospitals.insert(0, {
-                "id": hospital_id,
-                "name": "Uploaded Hospital Data" if hospital_id == "UPLOADED" else f"Uploaded: {hospital_id}",
-                "location": "Custom Data",
-                "is_uploaded": True
-            })
+    # Prepend uploaded data hospitals, most recent upload first
+    existing_ids = {h["id"] for h in hospitals}
+    uploaded = [
+        {
+            "id": hospital_id,
+            "name": "Uploaded Hospital Data" if hospital_id == "UPLOADED" else f"Uploaded: {hospital_id}",
+            "location": "Custom Data",
+            "is_uploaded": True
+        }
+        for hospital_id in reversed(upload_state.uploaded)
+        if hospital_id not in existing_ids
+    ]
     
-    return {"hospitals": hospitals}
+    return {"hospitals": uploaded + hospitals}
 
 
 @app.get("/api/alerts")
@@ -640,6 +772,7 @@ async def get_alerts(hospital_id: str = "H001"):
     try:
         df = get_or_generate_data(hospital_id)
         latest = df.iloc[-1]
+        now_iso = datetime.now(timezone.utc).isoformat()
         
         alerts = []
         
@@ -652,14 +785,14 @@ async def get_alerts(hospital_id: str = "H001"):
                 "id": 1,
                 "severity": "critical",
                 "message": f"ICU at {icu_occ:.0f}% capacity - {int(latest['total_icu_beds'] - latest['occupied_icu'])} beds remaining",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso
             })
         elif icu_occ >= 75:
             alerts.append({
                 "id": 1,
                 "severity": "warning",
                 "message": f"ICU at {icu_occ:.0f}% capacity - monitor closely",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso
             })
         
         if bed_occ >= 90:
@@ -667,14 +800,14 @@ async def get_alerts(hospital_id: str = "H001"):
                 "id": 2,
                 "severity": "critical",
                 "message": f"Bed occupancy critical at {bed_occ:.0f}%",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso
             })
         elif bed_occ >= 80:
             alerts.append({
                 "id": 2,
                 "severity": "warning",
                 "message": f"Bed occupancy elevated at {bed_occ:.0f}%",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso
             })
         
         if latest.get('pollution', 0) >= 150:
@@ -682,7 +815,7 @@ async def get_alerts(hospital_id: str = "H001"):
                 "id": 3,
                 "severity": "warning",
                 "message": f"High AQI ({int(latest['pollution'])}) - expect respiratory admissions",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso
             })
         
         return {"alerts": alerts, "count": len(alerts)}
@@ -698,34 +831,54 @@ async def upload_file(file: UploadFile = File(...), hospital_id: str = Query("UP
     Upload hospital data from CSV or Excel file.
     The uploaded data will be used instead of simulated data.
     """
-    global uploaded_data
+    global upload_state
     
     try:
         # Validate file type
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
-        file_ext = file.filename.lower().split('.')[-1]
-        if file_ext not in ['csv', 'xlsx', 'xls']:
+        file_ext = os.path.splitext(file.filename)[1][1:].lower()
+        if file_ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail="Only CSV and Excel files are supported")
         
-        # Read file content
-        content = await file.read()
+        # Starlette has already spooled the whole part by now, so this only bounds
+        # what is copied into memory: reject on the reported size when known, else
+        # stop reading as soon as the content passes the limit
+        limit = MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        if file.size is not None and file.size > limit:
+            raise HTTPException(status_code=413, detail=f"File exceeds the {MAX_UPLOAD_SIZE_MB}MB upload limit")
+        buffer = bytearray()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            buffer.extend(chunk)
+            if len(buffer) > limit:
+                raise HTTPException(status_code=413, detail=f"File exceeds the {MAX_UPLOAD_SIZE_MB}MB upload limit")
+        content = bytes(buffer)
         
-        # Parse file based on type
+        # Parse file based on type off the event loop, loading only the columns the
+        # schema reads; CSVs go through the multi-threaded Arrow reader so numeric
+        # columns arrive typed and skip the to_numeric coercion below
         if file_ext == 'csv':
-            df = pd.read_csv(io.BytesIO(content))
+            df = await run_in_threadpool(read_upload_csv, content)
         else:
-            df = pd.read_excel(io.BytesIO(content))
+            df = await run_in_threadpool(
+                pd.read_excel, io.BytesIO(content),
+                usecols=lambda name: normalize_column_name(str(name)) in UPLOAD_KNOWN_COLUMNS
+            )
         
         # Validate and process the data
-        processed_df, validation_result = process_uploaded_file(df)
+        processed_df, validation_result = await run_in_threadpool(process_uploaded_file, df)
         
         if not validation_result['valid']:
             raise HTTPException(status_code=400, detail=validation_result['error'])
         
-        # Store the processed data
-        uploaded_data[hospital_id] = processed_df
+        # Swap in a snapshot holding the processed data; the new revision
+        # invalidates cached predictions
+        upload_state = replace(
+            upload_state,
+            uploaded={**upload_state.uploaded, hospital_id: processed_df},
+            rev=upload_state.rev + 1
+        )
         
         return {
             "success": True,
@@ -749,6 +902,62 @@ async def upload_file(file: UploadFile = File(...), hospital_id: str = Query("UP
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
 
+def normalize_column_name(name: str) -> str:
+    """Normalize a column name the way process_uploaded_file does (lowercase, stripped, underscores)."""
+    return name.lower().strip().replace(' ', '_')
+
+
+def csv_upload_columns(content: bytes) -> Optional[List[str]]:
+    """
+    Names in a CSV upload's header that the upload schema reads.
+    
+    The Arrow reader only accepts a list of names, so the header line is parsed
+    here; returns None to read every column when no header name is recognized.
+    """
+    header_line = content.split(b'\n', 1)[0].decode('utf-8-sig', errors='replace')
+    header = next(csv.reader([header_line]), [])
+    names = [name for name in header if normalize_column_name(name) in UPLOAD_KNOWN_COLUMNS]
+    return names or None
+
+
+def read_upload_csv(content: bytes) -> pd.DataFrame:
+    """
+    Parse a CSV upload with the multi-threaded Arrow reader.
+    
+    The Arrow reader rejects rows with missing trailing fields, so such files
+    are re-read with the default engine, which fills the gaps with NaN.
+    """
+    usecols = csv_upload_columns(content)
+    try:
+        return pd.read_csv(io.BytesIO(content), engine='pyarrow', dtype_backend='pyarrow', usecols=usecols)
+    except pd.errors.ParserError:
+        return pd.read_csv(io.BytesIO(content), usecols=usecols)
+
+
+def narrow_int_dtype(values: np.ndarray):
+    """Narrowest of UPLOAD_COUNT_DTYPES whose range holds every value."""
+    low, high = values.min(initial=0), values.max(initial=0)
+    for dtype in UPLOAD_COUNT_DTYPES:
+        limits = np.iinfo(dtype)
+        if limits.min <= low and high <= limits.max:
+            return dtype
+    return values.dtype
+
+
+def numeric_column(series: pd.Series, default, dtype=np.int64) -> np.ndarray:
+    """
+    Convert a column to a NumPy array of ``dtype`` in a single cast.
+    
+    Missing and unparseable values are filled with ``default`` during the cast;
+    only columns that did not parse as numeric are coerced first, going through
+    object dtype because to_numeric mishandles Arrow strings holding both blank
+    and unparseable cells.
+    """
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series.astype(object), errors='coerce', dtype_backend='numpy_nullable')
+    return series.to_numpy(dtype=dtype, na_value=default)
+
+
 def process_uploaded_file(df: pd.DataFrame) -> tuple:
     """
     Process and validate uploaded hospital data.
@@ -763,36 +972,30 @@ def process_uploaded_file(df: pd.DataFrame) -> tuple:
         'columns_generated': []
     }
     
-    # Required columns mapping (user column -> our column)
-    required_cols = ['date', 'occupied_beds', 'total_beds']
-    optional_cols = ['occupied_icu', 'total_icu_beds', 'ventilators_used', 'total_ventilators', 
-                     'staff_on_duty', 'flu_cases', 'temperature', 'humidity', 'pollution']
-    
     # Normalize column names (lowercase, strip whitespace)
     df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
+    columns = set(df.columns)
     
     processed = pd.DataFrame()
     
-    # Check for required columns
-    for col in required_cols:
-        if col in df.columns:
+    # One PCG64 generator supplies every synthetic column
+    rng = np.random.default_rng()
+    n = len(df)
+    
+    # Check for required columns, collecting alternative names into one rename
+    renames = {}
+    for col in UPLOAD_REQUIRED_COLUMNS:
+        if col in columns:
             validation['columns_found'].append(col)
+            continue
+        alt = next((alt for alt in UPLOAD_COLUMN_ALTERNATIVES[col] if alt in columns), None)
+        if alt is None:
+            validation['columns_missing'].append(col)
         else:
-            # Try common alternatives
-            alternatives = {
-                'date': ['datetime', 'time', 'day', 'record_date'],
-                'occupied_beds': ['beds_occupied', 'current_beds', 'beds_used', 'occupied'],
-                'total_beds': ['bed_capacity', 'capacity', 'max_beds', 'beds_total']
-            }
-            found = False
-            for alt in alternatives.get(col, []):
-                if alt in df.columns:
-                    df = df.rename(columns={alt: col})
-                    validation['columns_found'].append(f"{col} (from {alt})")
-                    found = True
-                    break
-            if not found:
-                validation['columns_missing'].append(col)
+            renames[alt] = col
+            validation['columns_found'].append(f"{col} (from {alt})")
+    if renames:
+        df = df.rename(columns=renames)
     
     # If missing required columns, return error
     if validation['columns_missing']:
@@ -809,89 +1012,33 @@ def process_uploaded_file(df: pd.DataFrame) -> tuple:
         return None, validation
     
     # Process required numeric columns
-    processed['occupied_beds'] = pd.to_numeric(df['occupied_beds'], errors='coerce').fillna(100).astype(int)
-    processed['total_beds'] = pd.to_numeric(df['total_beds'], errors='coerce').fillna(200).astype(int)
-    
-    # Process optional columns or generate defaults
-    if 'occupied_icu' in df.columns:
-        processed['occupied_icu'] = pd.to_numeric(df['occupied_icu'], errors='coerce').fillna(15).astype(int)
-        validation['columns_found'].append('occupied_icu')
-    else:
-        processed['occupied_icu'] = (processed['occupied_beds'] * 0.15).astype(int)
-        validation['columns_generated'].append('occupied_icu')
-    
-    if 'total_icu_beds' in df.columns:
-        processed['total_icu_beds'] = pd.to_numeric(df['total_icu_beds'], errors='coerce').fillna(30).astype(int)
-        validation['columns_found'].append('total_icu_beds')
-    else:
-        processed['total_icu_beds'] = 30
-        validation['columns_generated'].append('total_icu_beds')
-    
-    if 'ventilators_used' in df.columns:
-        processed['ventilators_used'] = pd.to_numeric(df['ventilators_used'], errors='coerce').fillna(10).astype(int)
-        validation['columns_found'].append('ventilators_used')
-    else:
-        processed['ventilators_used'] = (processed['occupied_icu'] * 0.5).astype(int)
-        validation['columns_generated'].append('ventilators_used')
-    
-    if 'total_ventilators' in df.columns:
-        processed['total_ventilators'] = pd.to_numeric(df['total_ventilators'], errors='coerce').fillna(20).astype(int)
-        validation['columns_found'].append('total_ventilators')
-    else:
-        processed['total_ventilators'] = 20
-        validation['columns_generated'].append('total_ventilators')
-    
-    if 'staff_on_duty' in df.columns:
-        processed['staff_on_duty'] = pd.to_numeric(df['staff_on_duty'], errors='coerce').fillna(120).astype(int)
-        validation['columns_found'].append('staff_on_duty')
-    else:
-        processed['staff_on_duty'] = np.random.randint(100, 140, len(df))
-        validation['columns_generated'].append('staff_on_duty')
-    
-    if 'flu_cases' in df.columns:
-        processed['flu_cases'] = pd.to_numeric(df['flu_cases'], errors='coerce').fillna(30).astype(int)
-        validation['columns_found'].append('flu_cases')
-    else:
-        processed['flu_cases'] = np.random.poisson(30, len(df))
-        validation['columns_generated'].append('flu_cases')
+    processed['occupied_beds'] = numeric_column(df['occupied_beds'], 100)
+    processed['total_beds'] = numeric_column(df['total_beds'], 200)
     
-    if 'temperature' in df.columns:
-        processed['temperature'] = pd.to_numeric(df['temperature'], errors='coerce').fillna(25).round(1)
-        validation['columns_found'].append('temperature')
-    else:
-        processed['temperature'] = np.random.normal(25, 5, len(df)).round(1)
-        validation['columns_generated'].append('temperature')
-    
-    if 'humidity' in df.columns:
-        processed['humidity'] = pd.to_numeric(df['humidity'], errors='coerce').fillna(60).astype(int)
-        validation['columns_found'].append('humidity')
-    else:
-        processed['humidity'] = np.random.normal(60, 10, len(df)).astype(int)
-        validation['columns_generated'].append('humidity')
-    
-    # Check for pollution/aqi column
-    pollution_col = None
-    for col in ['pollution', 'aqi', 'air_quality', 'pollution_aqi']:
-        if col in df.columns:
-            pollution_col = col
-            break
-    
-    if pollution_col:
-        processed['pollution'] = pd.to_numeric(df[pollution_col], errors='coerce').fillna(75).astype(int)
-        validation['columns_found'].append('pollution')
-    else:
-        processed['pollution'] = np.random.gamma(2, 30, len(df)).astype(int)
-        validation['columns_generated'].append('pollution')
+    # Process optional columns from the first matching source, or generate defaults
+    for col, sources, default, dtype, generate in UPLOAD_OPTIONAL_COLUMNS:
+        source = next((name for name in sources if name in columns), None)
+        if source is None:
+            processed[col] = generate(processed, rng, n)
+            validation['columns_generated'].append(col)
+            continue
+        values = numeric_column(df[source], default, dtype)
+        processed[col] = values.round(1) if dtype is np.float64 else values
+        validation['columns_found'].append(col)
     
     # Add derived columns
     processed['total_staff'] = 150
     processed['oxygen_consumed'] = (processed['occupied_beds'] * 1.5).astype(int)
-    processed['medication_stock'] = np.random.randint(500, 1000, len(df))
-    processed['emergency_admissions'] = np.random.poisson(15, len(df))
+    processed['medication_stock'] = rng.integers(500, 1000, n)
+    processed['emergency_admissions'] = rng.poisson(15, n)
     processed['is_weekend'] = processed['date'].dt.dayofweek >= 5
     processed['hospital_id'] = 'UPLOADED'
     processed['hospital_name'] = 'Uploaded Hospital Data'
     
+    # Downcast count columns to the narrowest dtype that holds them
+    processed = processed.astype({col: narrow_int_dtype(processed[col].to_numpy())
+                                  for col in UPLOAD_COUNT_COLUMNS})
+    
     # Set date as index
     processed.set_index('date', inplace=True)
     processed.sort_index(inplace=True)
@@ -906,7 +1053,7 @@ def process_uploaded_file(df: pd.DataFrame) -> tuple:
 @app.get("/api/upload/status")
 async def get_upload_status():
     """Get status of uploaded data."""
-    global uploaded_data
+    uploaded_data = upload_state.uploaded
     
     uploads = []
     for hospital_id, df in uploaded_data.items():
@@ -929,36 +1076,47 @@ async def get_upload_status():
 @app.delete("/api/upload/{hospital_id}")
 async def delete_uploaded_data(hospital_id: str):
     """Delete uploaded data for a hospital."""
-    global uploaded_data
+    global upload_state
     
-    if hospital_id in uploaded_data:
-        del uploaded_data[hospital_id]
+    if hospital_id in upload_state.uploaded:
+        upload_state = replace(
+            upload_state,
+            uploaded={hid: df for hid, df in upload_state.uploaded.items() if hid != hospital_id},
+            rev=upload_state.rev + 1
+        )
         return {"success": True, "message": f"Deleted uploaded data for {hospital_id}"}
     else:
         raise HTTPException(status_code=404, detail=f"No uploaded data found for {hospital_id}")
 
 
-@app.get("/api/upload/template")
-async def get_upload_template():
-    """Get a sample CSV template for data upload."""
+@lru_cache(maxsize=1)
+def build_upload_template() -> bytes:
+    """Build the sample upload template once, already serialized to JSON."""
+    rng = np.random.default_rng(2025)
     dates = pd.date_range('2025-01-01', periods=30, freq='D')
     
     template_data = {
-        'date': dates.strftime('%Y-%m-%d'),
-        'occupied_beds': np.random.randint(100, 180, 30),
+        'date': dates.strftime('%Y-%m-%d').tolist(),
+        'occupied_beds': rng.integers(100, 180, 30),
         'total_beds': [200] * 30,
-        'occupied_icu': np.random.randint(10, 25, 30),
+        'occupied_icu': rng.integers(10, 25, 30),
         'total_icu_beds': [30] * 30,
-        'ventilators_used': np.random.randint(5, 15, 30),
+        'ventilators_used': rng.integers(5, 15, 30),
         'total_ventilators': [20] * 30,
-        'staff_on_duty': np.random.randint(100, 140, 30),
-        'flu_cases': np.random.poisson(40, 30),
-        'temperature': np.random.normal(25, 5, 30).round(1),
-        'humidity': np.random.normal(60, 10, 30).round(0).astype(int),
-        'pollution': np.random.randint(50, 150, 30)
+        'staff_on_duty': rng.integers(100, 140, 30),
+        'flu_cases': rng.poisson(40, 30),
+        'temperature': rng.normal(25, 5, 30).round(1),
+        'humidity': rng.normal(60, 10, 30).round(0).astype(int),
+        'pollution': rng.integers(50, 150, 30)
     }
     
-    return convert_numpy(template_data)
+    return orjson.dumps(template_data, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+@app.get("/api/upload/template")
+async def get_upload_template():
+    """Get a sample CSV template for data upload."""
+    return Response(content=build_upload_template(), media_type="application/json")
 
 
 # Run with: uvicorn api:app --reload --port 8000
@@ -16,6 +16,7 @@ from charts import (plot_time_series, show_metrics, show_resource_metrics,
                     plot_multi_hospital_comparison, plot_scenario_comparison)
 from alerts import show_alerts, show_capacity_gauge
 from advisories import show_advisory, show_risk_summary
+from dashboard_state import extract_state
 from scenarios import apply_scenario, compare_scenarios, SCENARIO_DESCRIPTIONS
 from export_utils import export_to_csv, generate_summary_report
 
@@ -150,8 +151,11 @@ try:
 except Exception as e:
     predictions = None
 
+# Snapshot the latest metrics once for the alert and advisory panels
+dashboard_state = extract_state(df_with_surge)
+
 # Display alerts
-show_alerts(df_with_surge)
+show_alerts(dashboard_state)
 st.markdown("---")
 
 # Main tabs - now with 9 tabs including Agentic AI
@@ -224,7 +228,7 @@ with tab3:
             st.dataframe(pred_df, hide_index=True)
             
             avg_pred = predictions.mean()
-            current = df_with_surge['occupied_beds'].iloc[-1]
+            current = df_with_surge['occupied_beds'].values[-1]
             trend = "📈 Increasing" if avg_pred > current else "📉 Decreasing"
             
             st.info(f"""
@@ -241,7 +245,7 @@ with tab3:
         st.error("Unable to generate predictions.")
     
     st.markdown("---")
-    show_advisory(df_with_surge)
+    show_advisory(dashboard_state)
 
 # Tab 4: What-If Scenarios
 with tab4:
@@ -456,16 +460,17 @@ with tab7:
             st.subheader("⏳ Pending Approval")
             pending = agent.get_pending_actions_summary()
             if pending:
-                for i, action in enumerate(pending):
+                for action in pending:
+                    action_id = action['id']
                     with st.container():
                         st.markdown(f"**{action['action']}**")
                         st.caption(f"Type: {action['type']} | Priority: {'⭐' * action['priority']}")
                         c1, c2 = st.columns(2)
-                        if c1.button("✅ Approve", key=f"approve_{i}"):
-                            agent.approve_action(i)
+                        if c1.button("✅ Approve", key=f"approve_{action_id}"):
+                            agent.approve_action(action_id)
                             st.rerun()
-                        if c2.button("❌ Reject", key=f"reject_{i}"):
-                            agent.reject_action(i)
+                        if c2.button("❌ Reject", key=f"reject_{action_id}"):
+                            agent.reject_action(action_id)
                             st.rerun()
             else:
                 st.info("No actions pending")
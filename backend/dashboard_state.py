@@ -0,0 +1,111 @@
+"""
+Dashboard State Module for HospitAI
+Reads the latest hospital metrics once so the alert and advisory panels
+share a single snapshot instead of each re-indexing the DataFrame.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+
+# Columns read from the most recent row
+SNAPSHOT_COLUMNS = ('pollution', 'flu_cases', 'temperature', 'medication_stock',
+                    'occupied_beds', 'total_beds', 'occupied_icu', 'total_icu_beds',
+                    'ventilators_used', 'total_ventilators', 'staff_on_duty')
+
+# Bed, ICU, ventilator and staff ratios as paired numerator/denominator columns
+RATIO_NUMERATORS = ('occupied_beds', 'occupied_icu', 'ventilators_used', 'staff_on_duty')
+RATIO_DENOMINATORS = ('total_beds', 'total_icu_beds', 'total_ventilators', 'occupied_beds')
+
+# Occupancy thresholds shared by the alert and advisory panels, ascending:
+# high occupancy, capacity advisory, high capacity risk, critical occupancy
+OCCUPANCY_THRESHOLDS = np.array([0.75, 0.80, 0.85, 0.90])
+OCCUPANCY_HIGH, OCCUPANCY_ADVISORY, OCCUPANCY_RISK_HIGH, OCCUPANCY_CRITICAL = OCCUPANCY_THRESHOLDS
+
+# Ratio used when the denominator is zero: no capacity reads as empty and no
+# patients reads as fully staffed, so neither raises a spurious alert
+RATIO_FALLBACKS = np.array([0.0, 0.0, 0.0, np.inf])
+
+
+@dataclass(frozen=True)
+class DashboardState:
+    """Snapshot of the latest hospital metrics and derived ratios."""
+    pollution: float
+    flu_cases: float
+    temperature: float
+    medication_stock: float
+    occupied_beds: float
+    total_beds: float
+    occupied_icu: float
+    total_icu_beds: float
+    ventilators_used: float
+    total_ventilators: float
+    staff_on_duty: float
+    bed_ratio: float
+    icu_ratio: float
+    vent_ratio: float
+    staff_ratio: float
+    risk_score: Optional[float] = None
+
+
+@lru_cache(maxsize=32)
+def _column_positions(columns):
+    """
+    Map each column name in the ``columns`` tuple to its position.
+
+    Cached per schema; the map also serves as the column-membership set, so
+    callers never search the DataFrame's column index.
+    """
+    return {col: i for i, col in enumerate(columns)}
+
+
+def compute_ratios(latest, min_patients=0):
+    """
+    Calculate the bed, ICU, ventilator and staff ratios in one vectorized divide.
+    
+    Args:
+        latest (Mapping): Latest value of each RATIO_NUMERATORS and RATIO_DENOMINATORS column
+        min_patients (float): Floor for the occupied beds the staff ratio divides by
+    
+    Returns:
+        tuple: (numerators, denominators, ratios) float arrays; zero denominators
+        give RATIO_FALLBACKS
+    """
+    nums = np.array([latest[col] for col in RATIO_NUMERATORS], dtype=float)
+    dens = np.array([latest[col] for col in RATIO_DENOMINATORS], dtype=float)
+    dens[-1] = max(dens[-1], min_patients)
+    ratios = np.divide(nums, dens, out=RATIO_FALLBACKS.copy(), where=dens > 0)
+    return nums, dens, ratios
+
+
+def extract_state(df):
+    """
+    Read the most recent row of hospital data into a DashboardState.
+
+    Args:
+        df (pd.DataFrame): Hospital data, optionally with a risk_score column
+
+    Returns:
+        DashboardState: Latest metrics with bed, ICU, ventilator and staff ratios
+    """
+    positions = _column_positions(tuple(df.columns))
+
+    # Check for the optional risk score once and read it with the rest of the row,
+    # using positional scalar access so neither axis index is searched
+    has_risk = 'risk_score' in positions
+    columns = SNAPSHOT_COLUMNS + ('risk_score',) if has_risk else SNAPSHOT_COLUMNS
+    latest = {col: df.iat[-1, positions[col]] for col in columns}
+
+    bed_ratio, icu_ratio, vent_ratio, staff_ratio = compute_ratios(latest)[2]
+
+    return DashboardState(
+        **{col: latest[col] for col in SNAPSHOT_COLUMNS},
+        bed_ratio=bed_ratio,
+        icu_ratio=icu_ratio,
+        vent_ratio=vent_ratio,
+        staff_ratio=staff_ratio,
+        risk_score=latest['risk_score'] if has_risk else None
+    )
@@ -4,6 +4,8 @@ Uses Google Gemini API for generating summaries and advisories.
 """
 
 import os
+from functools import lru_cache
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,17 +14,20 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 DEMO_MODE = os.getenv("DEMO_MODE", "false").lower() == "true"
 
-# Try to import and configure Gemini
-GEMINI_AVAILABLE = False
-genai = None
-
+# Gemini is available when a key is set and the SDK is installed; the SDK is
+# imported and configured on the first call rather than at import time
 try:
-    import google.generativeai as genai
-    if GEMINI_API_KEY:
-        genai.configure(api_key=GEMINI_API_KEY)
-        GEMINI_AVAILABLE = True
+    GEMINI_AVAILABLE = bool(GEMINI_API_KEY) and find_spec("google.generativeai") is not None
 except ImportError:
-    pass
+    GEMINI_AVAILABLE = False
+
+
+@lru_cache(maxsize=1)
+def get_gemini_model():
+    """Import and configure the Gemini SDK once, returning the shared model client."""
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel('gemini-1.5-flash')
 
 
 def call_gemini(prompt: str) -> str:
@@ -31,8 +36,7 @@ def call_gemini(prompt: str) -> str:
         return None
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
+        response = get_gemini_model().generate_content(prompt)
         return response.text.strip()
     except Exception as e:
         return f"⚠️ Gemini Error: {str(e)}"
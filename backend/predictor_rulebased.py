@@ -45,26 +45,31 @@ def predict_surge(df):
     VENTILATOR_THRESHOLD = 0.70
     STAFF_RATIO_MIN = 1.0
 
-    # Individual risk factors
-    df['risk_flu'] = (df['flu_avg_7d'] > FLU_THRESHOLD).astype(int)
-    df['risk_pollution'] = (df['pollution_avg_7d'] > POLLUTION_THRESHOLD).astype(int)
-    df['risk_beds'] = (df['bed_occupancy_ratio'] > BED_OCCUPANCY_THRESHOLD).astype(int)
-    df['risk_icu'] = (df['icu_occupancy_ratio'] > ICU_OCCUPANCY_THRESHOLD).astype(int)
-    df['risk_ventilators'] = (df['ventilator_usage_ratio'] > VENTILATOR_THRESHOLD).astype(int)
-    df['risk_staff'] = (df['staff_ratio'] < STAFF_RATIO_MIN).astype(int)
+    # Individual risk factors, evaluated on the raw column arrays in one pass
+    factors = np.column_stack([
+        df['flu_avg_7d'].to_numpy() > FLU_THRESHOLD,
+        df['pollution_avg_7d'].to_numpy() > POLLUTION_THRESHOLD,
+        df['bed_occupancy_ratio'].to_numpy() > BED_OCCUPANCY_THRESHOLD,
+        df['icu_occupancy_ratio'].to_numpy() > ICU_OCCUPANCY_THRESHOLD,
+        df['ventilator_usage_ratio'].to_numpy() > VENTILATOR_THRESHOLD,
+        df['staff_ratio'].to_numpy() < STAFF_RATIO_MIN
+    ])
+    risk_columns = ['risk_flu', 'risk_pollution', 'risk_beds', 'risk_icu', 'risk_ventilators', 'risk_staff']
+    for col, hits in zip(risk_columns, factors.T):
+        df[col] = hits.astype(int)
     
     # Calculate risk score (0-6)
-    risk_columns = ['risk_flu', 'risk_pollution', 'risk_beds', 'risk_icu', 'risk_ventilators', 'risk_staff']
-    df['risk_score'] = df[risk_columns].sum(axis=1)
+    risk_score = factors.sum(axis=1)
+    df['risk_score'] = risk_score
     
     # Surge risk: any 2+ factors present
-    df['surge_risk'] = (df['risk_score'] >= 2).astype(int)
+    df['surge_risk'] = (risk_score >= 2).astype(int)
     
-    # Risk level categorization
-    df['risk_level'] = pd.cut(
-        df['risk_score'],
-        bins=[-1, 0, 1, 2, 4, 6],
-        labels=['Normal', 'Low', 'Moderate', 'High', 'Critical']
+    # Risk level categorization: scores 0, 1, 2, 3-4 and 5-6
+    df['risk_level'] = pd.Categorical.from_codes(
+        np.searchsorted([0, 1, 2, 4, 6], risk_score),
+        categories=['Normal', 'Low', 'Moderate', 'High', 'Critical'],
+        ordered=True
     )
     
     return df
@@ -0,0 +1,27 @@
+"""
+Tests for the advisory threshold bands.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import advisories  # noqa: E402
+
+
+class ComputeAdvisoriesTests(unittest.TestCase):
+    def test_missing_readings_raise_no_advisory(self):
+        nan = float("nan")
+        self.assertEqual(advisories._compute_advisories(nan, 0.0, nan, 0.5), [])
+
+    def test_threshold_edges(self):
+        self.assertEqual(advisories._compute_advisories(100.0, 0.0, 30.0, 0.5), [])
+        bodies = [body for _, body in advisories._compute_advisories(151.0, 0.0, 31.0, 0.5)]
+        self.assertIn(advisories.AIR_QUALITY_ADVISORY.format(severity="Unhealthy"), bodies)
+        self.assertIn(advisories.HEAT_ADVISORY, bodies)
+
+
+if __name__ == "__main__":
+    unittest.main()
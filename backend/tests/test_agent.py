@@ -0,0 +1,52 @@
+"""
+Tests for the HospitAI agent cycle.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai_agent  # noqa: E402
+from data_generator import generate_data  # noqa: E402
+from predictor_rulebased import predict_surge  # noqa: E402
+
+
+class RunCycleTests(unittest.TestCase):
+    def setUp(self):
+        df = predict_surge(generate_data(num_days=30))
+        # Push bed occupancy past the warning threshold so the cycle queues an action
+        df['occupied_beds'] = (df['total_beds'] * 0.85).astype(int)
+        self.data = ai_agent.to_hospital_data(df)
+
+    def test_identical_cycles_queue_actions_once(self):
+        agent = ai_agent.HospitAIAgent()
+        agent.run_cycle(self.data)
+        queued = len(agent.pending_actions)
+        self.assertGreater(queued, 0)
+
+        # Runs past two periodic cache refreshes
+        for _ in range(2 * ai_agent.CACHE_REFRESH_CYCLES):
+            agent.run_cycle(self.data)
+            self.assertEqual(len(agent.pending_actions), queued)
+
+    def test_approve_and_reject_by_stable_id(self):
+        agent = ai_agent.HospitAIAgent()
+        agent.run_cycle(self.data)
+        first, second = list(agent.pending_actions)[:2]
+        action = agent.pending_actions[second]
+
+        # A later cycle queues more actions without renumbering earlier ones
+        self.data['flu_cases'] = self.data['flu_cases'] + 1
+        agent.run_cycle(self.data)
+
+        self.assertTrue(agent.approve_action(second))
+        self.assertIs(agent.actions_taken[-1], action)
+        self.assertFalse(agent.approve_action(second))
+        self.assertTrue(agent.reject_action(first))
+        self.assertNotIn(first, agent.pending_actions)
+
+
+if __name__ == "__main__":
+    unittest.main()
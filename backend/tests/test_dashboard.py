@@ -0,0 +1,31 @@
+"""
+Tests for the dashboard response built from predicted hospital data.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api  # noqa: E402
+from data_generator import generate_data  # noqa: E402
+from predictor_rulebased import predict_surge  # noqa: E402
+
+
+class DashboardResponseTests(unittest.TestCase):
+    def test_zero_capacity_reads_as_empty(self):
+        df = predict_surge(generate_data(num_days=10))
+        df['total_beds'] = 0
+        df['total_icu_beds'] = 0
+        df['total_ventilators'] = 0
+
+        metrics = api.df_to_dashboard_response(df)['metrics']
+
+        self.assertEqual(metrics.bed_occupancy, 0.0)
+        self.assertEqual(metrics.icu_occupancy, 0.0)
+        self.assertEqual(metrics.ventilator_usage, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Tests for the /api/upload endpoint and uploaded-column processing.
+Run from the backend directory: python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api  # noqa: E402
+
+
+def make_csv(flu_cases, newline="\n"):
+    """Build an upload CSV with one row per flu_cases cell."""
+    rows = ["date,occupied_beds,total_beds,flu_cases"]
+    dates = pd.date_range("2025-01-01", periods=len(flu_cases)).strftime("%Y-%m-%d")
+    rows += [f"{date},{100 + i},200,{cell}" for i, (date, cell) in enumerate(zip(dates, flu_cases))]
+    return (newline.join(rows) + newline).encode()
+
+
+class NumericColumnTests(unittest.TestCase):
+    def test_arrow_strings_with_blank_and_unparseable_cells(self):
+        cells = [str(i) for i in range(39)]
+        cells[3], cells[7] = None, "abc"
+        series = pd.Series(cells, dtype="string[pyarrow]")
+
+        values = api.numeric_column(series, -1)
+
+        self.assertEqual(values.dtype, np.int64)
+        self.assertEqual(values[3], -1)
+        self.assertEqual(values[7], -1)
+        self.assertEqual(values[38], 38)
+
+
+class UploadTests(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(api.app)
+
+    def tearDown(self):
+        self.client.delete("/api/upload/TEST_UPLOAD")
+
+    def upload(self, filename, content, hospital_id="TEST_UPLOAD"):
+        return self.client.post(
+            "/api/upload",
+            params={"hospital_id": hospital_id},
+            files={"file": (filename, content)}
+        )
+
+    def test_csv_with_blank_and_non_numeric_cells(self):
+        cells = [str(i) for i in range(40)]
+        cells[3], cells[7] = "", "abc"
+
+        response = self.upload("hospital.csv", make_csv(cells))
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()["rows"], 40)
+        flu_cases = api.upload_state.uploaded["TEST_UPLOAD"]["flu_cases"]
+        self.assertFalse(flu_cases.isna().any())
+        self.assertEqual(flu_cases.iloc[3], 30)
+        self.assertEqual(flu_cases.iloc[7], 30)
+        self.assertEqual(flu_cases.iloc[39], 39)
+
+    def assert_flu_cases(self, expected):
+        flu_cases = api.upload_state.uploaded["TEST_UPLOAD"]["flu_cases"]
+        self.assertEqual(flu_cases.tolist(), expected)
+
+    def test_csv_with_blank_cells(self):
+        response = self.upload("hospital.csv", make_csv(["5", "", "7", ""]))
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assert_flu_cases([5, 30, 7, 30])
+
+    def test_csv_with_non_numeric_cells(self):
+        response = self.upload("hospital.csv", make_csv(["5", "n/a", "abc", "8"]))
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assert_flu_cases([5, 30, 30, 8])
+
+    def test_csv_with_crlf_line_endings(self):
+        response = self.upload("hospital.csv", make_csv(["5", "6", "", "8"], newline="\r\n"))
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()["rows"], 4)
+        self.assert_flu_cases([5, 6, 30, 8])
+        self.assertIn("flu_cases", response.json()["validation"]["columns_found"])
+
+    def test_csv_with_short_rows(self):
+        content = make_csv(["5", "6", "7"])[:-len(b",7\n")] + b"\n"
+
+        response = self.upload("hospital.csv", content)
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assert_flu_cases([5, 6, 30])
+
+    def test_csv_with_large_counts(self):
+        content = b"date,occupied_beds,total_beds\n2025-01-01,30000,40000\n2025-01-02,30500,40000\n"
+
+        response = self.upload("hospital.csv", content)
+
+        self.assertEqual(response.status_code, 200, response.text)
+        uploaded = api.upload_state.uploaded["TEST_UPLOAD"]
+        self.assertEqual(uploaded["occupied_beds"].tolist(), [30000, 30500])
+        self.assertEqual(uploaded["oxygen_consumed"].tolist(), [45000, 45750])
+
+    def test_xlsx(self):
+        df = pd.read_csv(io.BytesIO(make_csv(["5", "", "abc", "8"])))
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False)
+
+        response = self.upload("hospital.xlsx", buffer.getvalue())
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()["rows"], 4)
+        self.assert_flu_cases([5, 30, 30, 8])
+
+    def test_oversized_upload(self):
+        content = b"x" * (api.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + 1)
+
+        response = self.upload("hospital.csv", content)
+
+        self.assertEqual(response.status_code, 413)
+
+    def test_missing_required_column(self):
+        content = b"date,occupied_beds\n2025-01-01,100\n"
+
+        response = self.upload("hospital.csv", content)
+
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()